@@ -0,0 +1,81 @@
+"""Helpers shared by the benchmarks."""
+
+import importlib
+import io
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+INTEGRATION_DIR = os.path.join(ROOT, "custom_components", "intellicenter_custom")
+INTEGRATION_PATH = "custom_components/intellicenter_custom"
+PACKAGE_PATH = INTEGRATION_PATH + "/pyintellicenter"
+
+# make 'pyintellicenter' importable without Home Assistant
+if INTEGRATION_DIR not in sys.path:
+    sys.path.insert(0, INTEGRATION_DIR)
+
+
+def importPackage(ref: str = None):
+    """Import pyintellicenter, either from the working tree or from a git revision.
+
+    A revision is extracted in a temporary directory and imported under
+    a different name so both versions can be compared in the same process.
+    """
+    if not ref:
+        return importlib.import_module("pyintellicenter")
+
+    name = "pyintellicenter_" + "".join(c if c.isalnum() else "_" for c in ref)
+    if name in sys.modules:
+        return sys.modules[name]
+
+    target = tempfile.mkdtemp(prefix="bench_")
+    os.mkdir(os.path.join(target, name))
+    files = subprocess.run(
+        ["git", "ls-tree", "--name-only", ref, PACKAGE_PATH + "/"],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.split()
+    for path in files:
+        content = subprocess.run(
+            ["git", "show", f"{ref}:{path}"], cwd=ROOT, check=True, capture_output=True
+        ).stdout
+        with open(os.path.join(target, name, os.path.basename(path)), "wb") as f:
+            f.write(content)
+
+    sys.path.insert(0, target)
+    return importlib.import_module(name)
+
+
+def importIntegration(ref: str = None):
+    """Import the integration, either from the working tree or from a git revision.
+
+    This requires Home Assistant. Like importPackage, a revision is
+    extracted in a temporary directory and imported under a different name.
+    """
+    if not ref:
+        if ROOT not in sys.path:
+            sys.path.insert(0, ROOT)
+        return importlib.import_module("custom_components.intellicenter_custom")
+
+    name = "intellicenter_" + "".join(c if c.isalnum() else "_" for c in ref)
+    if name in sys.modules:
+        return sys.modules[name]
+
+    target = tempfile.mkdtemp(prefix="bench_")
+    archive = subprocess.run(
+        ["git", "archive", ref, INTEGRATION_PATH],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+    ).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(target)
+    os.rename(os.path.join(target, INTEGRATION_PATH), os.path.join(target, name))
+
+    sys.path.insert(0, target)
+    return importlib.import_module(name)
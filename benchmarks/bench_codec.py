@@ -0,0 +1,114 @@
+"""Benchmark the JSON codecs available to the protocol.
+
+Decodes realistic NotifyList and GetParamList responses and encodes
+RequestParamList requests with every codec installed, and with the former
+str based path (json + decode()/encode()).
+
+usage: python benchmarks/bench_codec.py
+"""
+
+import json
+import random
+import timeit
+
+import _common  # noqa: F401
+
+from pyintellicenter import codec
+from pyintellicenter.attributes import ALL_ATTRIBUTES_BY_TYPE
+
+NUM_OBJECTS = 200
+
+
+def notifyList() -> bytes:
+    """Return a typical NotifyList line (pumps and chemistry readings)."""
+    rnd = random.Random(3)
+    objects = [
+        {
+            "objnam": f"PMP{index:02}",
+            "params": {
+                "RPM": str(rnd.randint(1000, 3450)),
+                "PWR": str(rnd.randint(100, 2000)),
+                "GPM": str(rnd.randint(10, 90)),
+                "STATUS": "10",
+            },
+        }
+        for index in range(3)
+    ]
+    objects.append(
+        {
+            "objnam": "CHM01",
+            "params": {"PHVAL": "7.4", "ORPVAL": "712", "QUALTY": "-0.1"},
+        }
+    )
+    return json.dumps(
+        {"command": "NotifyList", "messageID": "1234", "objectList": objects}
+    ).encode()
+
+
+def getParamList() -> bytes:
+    """Return a large GetParamList response, every attribute of many objects."""
+    rnd = random.Random(4)
+    types = list(ALL_ATTRIBUTES_BY_TYPE)
+    objects = []
+    for index in range(NUM_OBJECTS):
+        objtype = types[index % len(types)]
+        params = {
+            key: rnd.choice(["ON", "OFF", "00000", str(rnd.randint(0, 4000)), key])
+            for key in ALL_ATTRIBUTES_BY_TYPE[objtype]
+        }
+        objects.append({"objnam": f"OBJ{index:03}", "params": params})
+    return json.dumps(
+        {
+            "command": "SendParamList",
+            "messageID": "12",
+            "response": "200",
+            "objectList": objects,
+        }
+    ).encode()
+
+
+def requestParamList() -> dict:
+    """Return a typical RequestParamList request."""
+    return {
+        "messageID": "42",
+        "command": "RequestParamList",
+        "objectList": [
+            {"objnam": f"C{index:04}", "keys": ["SNAME", "STATUS", "USE", "SUBTYP"]}
+            for index in range(12)
+        ],
+    }
+
+
+def legacyDecode(data: bytes):
+    """Decode the way data_received/processMessage used to."""
+    return json.loads(data.decode())
+
+
+def legacyEncode(obj) -> bytes:
+    """Encode the way sendCmd/_writeToTransport used to."""
+    return json.dumps(obj).encode()
+
+
+def main():
+    """Run the benchmark and print the results."""
+    payloads = {
+        "decode NotifyList": notifyList(),
+        "decode GetParamList": getParamList(),
+    }
+    request = requestParamList()
+
+    codecs = {"legacy (str)": (legacyEncode, legacyDecode), **codec.CODECS}
+    print(f"default codec: {codec.CODEC_NAME}")
+    for label, data in payloads.items():
+        print(f"{label} ({len(data)} bytes)")
+        for name, (_, decode) in codecs.items():
+            number, elapsed = timeit.Timer(lambda: decode(data)).autorange()
+            print(f"  {name:14} {elapsed / number * 1e6:10.1f} us")
+    print("encode RequestParamList")
+    for name, (encode, _) in codecs.items():
+        number, elapsed = timeit.Timer(lambda: encode(request)).autorange()
+        print(f"  {name:14} {elapsed / number * 1e6:10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
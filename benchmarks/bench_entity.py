@@ -0,0 +1,133 @@
+"""Measure the cost of a state write (async_write_ha_state) per entity.
+
+Creates the entities of every platform for a simulated system, through the
+platforms' async_setup_entry, and writes their state in a Home Assistant
+instance (which is not started), for the working tree and for a git
+revision. Also reports the part spent in the properties the integration
+computes for each write (name and extra_state_attributes).
+
+This one requires Home Assistant to be installed.
+
+usage: python benchmarks/bench_entity.py [git revision, default HEAD]
+"""
+
+import asyncio
+import importlib
+import logging
+import sys
+import tempfile
+import timeit
+from types import SimpleNamespace
+
+from _common import importIntegration
+
+from homeassistant.core import HomeAssistant
+
+from pyintellicenter.simulator import SimulatedSystem
+
+NUM_OBJECTS = 200
+ENTRY_ID = "bench"
+SYSTEM_INFO = {"PROPNAME": "Bench", "VER": "1.064", "MODE": "ENGLISH", "SNAME": "b"}
+# the types of objects the integration keeps in its model (with all attributes)
+OBJECT_TYPES = ["BODY", "CIRCUIT", "CIRCGRP", "CHEM", "HEATER", "PUMP", "SENSE"]
+OBJECT_TYPES += ["SCHED", "SYSTEM"]
+
+
+def fullObjects() -> list:
+    """Return every object of a simulated system with all its attributes."""
+    sim = SimulatedSystem(NUM_OBJECTS, seed=NUM_OBJECTS)
+    return [
+        {"objnam": objnam, "params": dict(params)}
+        for objnam, params in sim.objects.items()
+    ]
+
+
+def best(function, repeat: int = 5) -> float:
+    """Return the best time (in seconds) of one call to function."""
+    number, _ = timeit.Timer(function).autorange()
+    return min(timeit.Timer(function).repeat(repeat, number)) / number
+
+
+async def createEntities(hass: HomeAssistant, integration) -> dict:
+    """Return, by platform, the entities the integration creates."""
+    library = importlib.import_module(integration.__name__ + ".pyintellicenter")
+    model = library.PoolModel({objtype: {} for objtype in OBJECT_TYPES})
+    model.addObjects(fullObjects())
+    controller = library.ModelController("127.0.0.1", model)
+    controller._systemInfo = library.SystemInfo("INCR", SYSTEM_INFO)
+    hass.data[integration.DOMAIN] = {ENTRY_ID: SimpleNamespace(controller=controller)}
+
+    entry = SimpleNamespace(entry_id=ENTRY_ID)
+    result = {}
+    for platform in integration.PLATFORMS:
+        try:
+            module = importlib.import_module(f"{integration.__name__}.{platform}")
+        except ImportError as err:
+            print(f"{integration.__name__}: no {platform} platform ({err})")
+            continue
+        entities = result[platform] = []
+        await module.async_setup_entry(hass, entry, entities.extend)
+        for index, entity in enumerate(entities):
+            entity.hass = hass
+            entity.entity_id = f"{platform}.bench_{index}"
+            # what being added to a platform sets
+            entity._state_info = {"unrecorded_attributes": frozenset()}
+    return result
+
+
+async def measure(integration) -> dict:
+    """Return, by platform, the number of entities and the time per entity.
+
+    of a state write and of the properties the integration computes for it
+    """
+    hass = HomeAssistant(tempfile.mkdtemp(prefix="bench_"))
+    result = {}
+    for platform, entities in (await createEntities(hass, integration)).items():
+        if not entities:
+            continue
+
+        def write():
+            for entity in entities:
+                entity.async_write_ha_state()
+
+        def properties():
+            for entity in entities:
+                entity.name
+                entity.extra_state_attributes
+
+        write()
+        result[platform] = (
+            len(entities),
+            best(write) / len(entities),
+            best(properties) / len(entities),
+        )
+    return result
+
+
+def main():
+    """Run the benchmark and print the results."""
+    ref = sys.argv[1] if len(sys.argv) > 1 else "HEAD"
+    # the entities are written without being added to a platform
+    logging.getLogger("homeassistant.helpers.entity").setLevel(logging.ERROR)
+
+    before = asyncio.run(measure(importIntegration(ref)))
+    after = asyncio.run(measure(importIntegration()))
+
+    print(f"{'per entity (us)':<26} {ref:>22} {'working tree':>22}")
+    for platform in after:
+        columns = []
+        for results in (before, after):
+            if platform in results:
+                count, write, properties = results[platform]
+                columns.append(f"{write * 1e6:8.2f} ({properties * 1e6:5.2f})")
+            else:
+                columns.append("n/a")
+        print(
+            f"{platform + f' x{after[platform][0]}':<26}"
+            f" {columns[0]:>22} {columns[1]:>22}"
+        )
+    print("state write (of which name and extra_state_attributes)")
+
+
+if __name__ == "__main__":
+    main()
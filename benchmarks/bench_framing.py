@@ -0,0 +1,141 @@
+"""Benchmark the framing of the data received from an IntelliCenter.
+
+Compares the LineFramer used by ICProtocol.data_received with the former
+implementation (str concatenation, only split when the buffer ends a line)
+on a replayed 5 MB burst, delivered in TCP-sized chunks.
+
+usage: python benchmarks/bench_framing.py
+"""
+
+import json
+import random
+import time
+
+import _common  # noqa: F401
+
+from pyintellicenter.protocol import LineFramer
+
+BURST_SIZE = 5 * 1024 * 1024
+
+
+class LegacyFramer:
+    """The framing logic of ICProtocol.data_received before LineFramer."""
+
+    def __init__(self):
+        """Initialize."""
+        self._lineBuffer = ""
+        # chunks that could not be decoded on their own (and were mangled)
+        self.decodeErrors = 0
+
+    def feed(self, data: bytes) -> list:
+        """Mimic the former data_received."""
+        try:
+            data = data.decode()
+        except UnicodeDecodeError:
+            # the former code raised here and lost the chunk
+            self.decodeErrors += 1
+            data = data.decode(errors="replace")
+        self._lineBuffer += data
+        if not self._lineBuffer.endswith("\r\n"):
+            return []
+        lines = str.split(self._lineBuffer, "\r\n")
+        self._lineBuffer = ""
+        return [line for line in lines if line]
+
+
+def notifyListBurst(size: int) -> bytes:
+    """Return a stream of NotifyList lines of (approximately) the given size."""
+    rnd = random.Random(42)
+    lines = []
+    total = 0
+    while total < size:
+        line = json.dumps(
+            {
+                "command": "NotifyList",
+                "messageID": str(rnd.randint(1, 1000000)),
+                "objectList": [
+                    {
+                        "objnam": f"PMP{rnd.randint(1, 9):02}",
+                        "params": {
+                            "RPM": str(rnd.randint(1000, 3450)),
+                            "PWR": str(rnd.randint(100, 2000)),
+                            "GPM": str(rnd.randint(10, 90)),
+                            "SNAME": "Pompe à chaleur",
+                        },
+                    }
+                ],
+            },
+            ensure_ascii=False,
+        ).encode()
+        lines.append(line + b"\r\n")
+        total += len(line) + 2
+    return b"".join(lines)
+
+
+def hardwareDefinition(size: int) -> bytes:
+    """Return a single, very large, line like a GetHardwareDefinition reply."""
+    objects = []
+    total = 0
+    index = 0
+    while total < size:
+        obj = {"objnam": f"C{index:04}", "params": {"SNAME": f"Circuit {index}"}}
+        objects.append(obj)
+        total += len(json.dumps(obj))
+        index += 1
+    msg = {"command": "SendQuery", "response": "200", "answer": objects}
+    return json.dumps(msg).encode() + b"\r\n"
+
+
+def chunks(data: bytes, seed: int = 0):
+    """Split data in TCP segment like chunks (not aligned on lines nor characters)."""
+    rnd = random.Random(seed)
+    result = []
+    pos = 0
+    while pos < len(data):
+        size = rnd.randint(500, 4096)
+        result.append(data[pos : pos + size])
+        pos += size
+    return result
+
+
+def run(framerClass, segments) -> dict:
+    """Feed all the segments to a new framer and return timing information."""
+    framer = framerClass()
+    lines = 0
+    maxLatency = 0
+    start = time.perf_counter()
+    for segment in segments:
+        before = time.perf_counter()
+        lines += len(framer.feed(segment))
+        maxLatency = max(maxLatency, time.perf_counter() - before)
+    elapsed = time.perf_counter() - start
+    return {
+        "lines": lines,
+        "seconds": elapsed,
+        "max_chunk_seconds": maxLatency,
+        "decode_errors": getattr(framer, "decodeErrors", 0),
+    }
+
+
+def main():
+    """Run the benchmark and print the results."""
+    scenarios = {
+        "NotifyList burst": notifyListBurst(BURST_SIZE),
+        "GetHardwareDefinition": hardwareDefinition(BURST_SIZE),
+    }
+    for name, data in scenarios.items():
+        segments = chunks(data)
+        print(f"{name}: {len(data)} bytes in {len(segments)} chunks")
+        for framerClass in (LegacyFramer, LineFramer):
+            result = run(framerClass, segments)
+            print(
+                f"  {framerClass.__name__:12} {result['seconds'] * 1000:9.1f} ms"
+                f"  {len(data) / result['seconds'] / 1e6:8.1f} MB/s"
+                f"  lines: {result['lines']}"
+                f"  worst chunk: {result['max_chunk_seconds'] * 1000:.2f} ms"
+                f"  decode errors: {result['decode_errors']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
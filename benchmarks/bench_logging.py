@@ -0,0 +1,90 @@
+"""Benchmark the cost of the debug logging on the message hot path.
+
+Feeds NotifyList messages through ICProtocol.data_received into a
+ModelController, with logging at INFO level (debug messages disabled),
+and reports the number of messages processed per second for the working
+tree and for a git revision.
+
+usage: python benchmarks/bench_logging.py [git revision, default HEAD]
+"""
+
+import json
+import logging
+import random
+import sys
+import time
+
+from _common import importPackage
+
+NUM_MESSAGES = 20000
+NUM_PUMPS = 10
+
+
+def messages(count: int) -> list:
+    """Return a list of (bytes) NotifyList lines changing pump values."""
+    rnd = random.Random(1)
+    result = []
+    for index in range(count):
+        msg = {
+            "command": "NotifyList",
+            "messageID": str(index),
+            "objectList": [
+                {
+                    "objnam": f"PMP{rnd.randrange(NUM_PUMPS):02}",
+                    "params": {
+                        "RPM": str(rnd.randint(1000, 3450)),
+                        "PWR": str(rnd.randint(100, 2000)),
+                        "GPM": str(rnd.randint(10, 90)),
+                    },
+                }
+            ],
+        }
+        result.append(json.dumps(msg).encode() + b"\r\n")
+    return result
+
+
+def run(package, lines) -> float:
+    """Return the number of messages per second processed by a given package."""
+    model = package.PoolModel()
+    model.addObjects(
+        [
+            {
+                "objnam": f"PMP{index:02}",
+                "params": {"OBJTYP": "PUMP", "SUBTYP": "SPEED", "SNAME": "Pump"},
+            }
+            for index in range(NUM_PUMPS)
+        ]
+    )
+    controller = package.ModelController("127.0.0.1", model)
+    controller._systemInfo = package.SystemInfo(
+        "INCR",
+        {"PROPNAME": "Bench", "VER": "1.0", "MODE": "ENGLISH", "SNAME": "Bench"},
+    )
+    received = []
+    controller._updatedCallback = lambda controller, updates: received.append(updates)
+    protocol = package.controller.ICProtocol(controller)
+
+    start = time.perf_counter()
+    for line in lines:
+        protocol.data_received(line)
+    elapsed = time.perf_counter() - start
+    return len(lines) / elapsed
+
+
+def main():
+    """Run the benchmark and print the results."""
+    ref = sys.argv[1] if len(sys.argv) > 1 else "HEAD"
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    lines = messages(NUM_MESSAGES)
+
+    for label, package in (
+        (ref, importPackage(ref)),
+        ("working tree", importPackage()),
+    ):
+        # best of 3
+        rate = max(run(package, lines) for _ in range(3))
+        print(f"{label:>14}: {rate:10.0f} messages/s")
+
+
+if __name__ == "__main__":
+    main()
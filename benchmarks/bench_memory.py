@@ -0,0 +1,93 @@
+"""Measure the memory held by the model, per 1000 objects.
+
+Builds a PoolModel from a GetParamList response decoded like the protocol
+does (every attribute of every object) and reports, with tracemalloc, the
+memory it keeps once the response is gone, for the working tree and for
+a git revision.
+
+usage: python benchmarks/bench_memory.py [git revision, default HEAD]
+"""
+
+import gc
+import json
+import random
+import sys
+import tracemalloc
+
+from _common import importPackage
+
+from pyintellicenter.attributes import (
+    ALL_ATTRIBUTES_BY_TYPE,
+    OBJTYP_ATTR,
+    SNAME_ATTR,
+    SUBTYP_ATTR,
+)
+
+NUM_OBJECTS = 1000
+
+
+def getParamList(count: int) -> bytes:
+    """Return the response to a GetParamList of every attribute of many objects."""
+    rnd = random.Random(5)
+    types = list(ALL_ATTRIBUTES_BY_TYPE)
+    objects = []
+    for index in range(count):
+        objtype = types[index % len(types)]
+        params = {
+            key: rnd.choice(["ON", "OFF", "00000", str(rnd.randint(0, 100)), key])
+            for key in ALL_ATTRIBUTES_BY_TYPE[objtype]
+        }
+        params[OBJTYP_ATTR] = objtype
+        params[SUBTYP_ATTR] = "GENERIC"
+        params[SNAME_ATTR] = f"Object number {index}"
+        objects.append({"objnam": f"OBJ{index:04}", "params": params})
+    return json.dumps(
+        {
+            "command": "SendParamList",
+            "messageID": "12",
+            "response": "200",
+            "objectList": objects,
+        }
+    ).encode()
+
+
+def decode(package, line: bytes) -> dict:
+    """Decode a message like the protocol of the package does."""
+    codec = getattr(package, "codec", None)
+    if codec is None:
+        # the trees before the codec module decoded with the stdlib json
+        return json.loads(line)
+    return codec.decode(line)
+
+
+def measure(package, line: bytes) -> tuple:
+    """Return the bytes held by the model and the model itself."""
+    gc.collect()
+    tracemalloc.start()
+    model = package.PoolModel()
+    model.addObjects(decode(package, line)["objectList"])
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, model
+
+
+def main():
+    """Run the benchmark and print the results."""
+    ref = sys.argv[1] if len(sys.argv) > 1 else "HEAD"
+    line = getParamList(NUM_OBJECTS)
+
+    for label, package in (
+        (ref, importPackage(ref)),
+        ("working tree", importPackage()),
+    ):
+        size, model = measure(package, line)
+        perThousand = size / model.numObjects * 1000
+        print(
+            f"{label:>14}: {perThousand / 1024:8.1f} KiB per 1000 objects"
+            f" ({model.numObjects} objects)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,472 @@
+"""End-to-end benchmarks of the pyintellicenter hot paths.
+
+Covers the framing and parsing of the incoming traffic, prune(), the
+creation and update of the model, its lookups, ModelController.start
+against the local simulator and the fan-out of the updates to the
+entities.
+
+The results are written as JSON so that two runs (typically two releases)
+can be compared:
+
+usage: python benchmarks/bench_suite.py [--filter TEXT] [--output FILE]
+                                        [--compare BASELINE.json]
+
+by default the results go to benchmarks/results/<version>-<revision>.json
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timezone
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import timeit
+
+from _common import INTEGRATION_DIR, ROOT
+
+from pyintellicenter import ModelController, PoolModel, UpdateRouter, codec
+from pyintellicenter.attributes import (
+    OBJTYP_ATTR,
+    PARENT_ATTR,
+    SNAME_ATTR,
+    SUBTYP_ATTR,
+)
+from pyintellicenter.controller import prune
+from pyintellicenter.protocol import ICProtocol
+from pyintellicenter.simulator import IntelliCenterSimulator, SimulatedSystem
+
+SIZES = (100, 1000, 10000)
+FANOUT_SIZES = (10, 100, 1000)
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# name -> function returning the seconds taken by one operation
+BENCHMARKS = {}
+
+
+def benchmark(name: str):
+    """Register a benchmark."""
+
+    def register(function):
+        BENCHMARKS[name] = function
+        return function
+
+    return register
+
+
+def measure(function, repeat: int = 5) -> float:
+    """Return the best time (in seconds) of one call to function."""
+    number, _ = timeit.Timer(function).autorange()
+    return min(timeit.Timer(function).repeat(repeat, number)) / number
+
+
+# ---------------------------------------------------------------------------
+# synthetic data
+
+
+def system(size: int) -> SimulatedSystem:
+    """Return a simulated system of a given size."""
+    return SimulatedSystem(size, seed=size)
+
+
+def startupObjects(size: int) -> list:
+    """Return the response to the request issued to list all objects."""
+    return system(size).select("", [OBJTYP_ATTR, SUBTYP_ATTR, SNAME_ATTR, PARENT_ATTR])
+
+
+def fullObjects(sim: SimulatedSystem) -> list:
+    """Return every object of a simulated system with all its attributes."""
+    return [
+        {"objnam": objnam, "params": dict(params)}
+        for objnam, params in sim.objects.items()
+    ]
+
+
+def copyObjects(objects: list) -> list:
+    """Return a copy of an objectList (PoolObject consumes its params)."""
+    return [{"objnam": obj["objnam"], "params": dict(obj["params"])} for obj in objects]
+
+
+def notifications(sim: SimulatedSystem, count: int) -> list:
+    """Return the objectList of count NotifyList, one change each."""
+    result = []
+    for _ in range(count):
+        objnam, changes = sim.randomChange()
+        result.append([{"objnam": objnam, "params": changes}])
+    return result
+
+
+def changeCycle(sim: SimulatedSystem, count: int) -> list:
+    """Return count notifications followed by the ones undoing them.
+
+    applying the whole cycle leaves the model as it was so it can be
+    applied again and again, every notification changing something
+    """
+    before = {objnam: dict(params) for objnam, params in sim.objects.items()}
+    forward = notifications(sim, count)
+    backward = []
+    for changes in forward:
+        for item in changes:
+            current = before[item["objnam"]]
+            backward.append(
+                [
+                    {
+                        "objnam": item["objnam"],
+                        "params": {key: current[key] for key in item["params"]},
+                    }
+                ]
+            )
+            current.update(item["params"])
+    return forward + list(reversed(backward))
+
+
+class NullController:
+    """Just enough of a controller for ICProtocol."""
+
+    def receivedMessage(self, msg_id, command, response, msg, oldest=None):
+        pass
+
+
+# ---------------------------------------------------------------------------
+# protocol
+
+
+@benchmark("protocol.data_received NotifyList stream (per line)")
+def benchData_received():
+    sim = system(1000)
+    lines = [
+        codec.encode(
+            {"command": "NotifyList", "messageID": str(index), "objectList": changes}
+        )
+        for index, changes in enumerate(notifications(sim, 2000))
+    ]
+    stream = b"\r\n".join(lines) + b"\r\n"
+    # the way TCP delivers it
+    chunks = [stream[pos : pos + 1460] for pos in range(0, len(stream), 1460)]
+
+    def run():
+        protocol = ICProtocol(NullController(), keepaliveInterval=0)
+        for chunk in chunks:
+            protocol.data_received(chunk)
+
+    return measure(run) / len(lines)
+
+
+@benchmark("protocol.data_received GetParamList 10000 objects")
+def benchData_receivedLarge():
+    sim = system(10000)
+    line = codec.encode(
+        {
+            "command": "SendParamList",
+            "messageID": "2",
+            "response": "200",
+            "objectList": sim.select("", list(sim.objects[sim.systemObjnam])),
+        }
+    )
+    stream = line + b"\r\n"
+    chunks = [stream[pos : pos + 1460] for pos in range(0, len(stream), 1460)]
+
+    def run():
+        protocol = ICProtocol(NullController(), keepaliveInterval=0)
+        for chunk in chunks:
+            protocol.data_received(chunk)
+
+    return measure(run, repeat=3)
+
+
+# ---------------------------------------------------------------------------
+# prune
+
+
+@benchmark("prune 10000 objects")
+def benchPrune():
+    sim = system(10000)
+    # ask for every attribute, most objects define only a few of them
+    keys = sorted({key for params in sim.objects.values() for key in params})
+    tree = sim.select("", keys)
+    return measure(lambda: prune(tree), repeat=3)
+
+
+# ---------------------------------------------------------------------------
+# model
+
+
+def _modelBenchmarks(size: int):
+    objects = startupObjects(size)
+
+    @benchmark(f"model.addObjects {size}")
+    def benchAddObjects():
+        # includes copying the objectList, a small fraction of the total
+        return measure(lambda: PoolModel().addObjects(copyObjects(objects)))
+
+    @benchmark(f"model.processUpdates {size} (per NotifyList)")
+    def benchProcessUpdates():
+        sim = system(size)
+        model = PoolModel()
+        model.addObjects(fullObjects(sim))
+        updates = changeCycle(sim, 500)
+
+        def run():
+            for changes in updates:
+                model.processUpdates(changes)
+
+        return measure(run) / len(updates)
+
+    @benchmark(f"model.getByType {size}")
+    def benchGetByType():
+        model = PoolModel()
+        model.addObjects(copyObjects(objects))
+        return measure(lambda: model.getByType("BODY", "POOL"))
+
+    @benchmark(f"model.getChildren {size}")
+    def benchGetChildren():
+        model = PoolModel()
+        model.addObjects(copyObjects(objects))
+        body = model["B1101"]
+        return measure(lambda: model.getChildren(body))
+
+
+for _size in SIZES:
+    _modelBenchmarks(_size)
+
+
+@benchmark("model platform setup 5000 (lookups per object)")
+def benchPlatformSetup():
+    model = PoolModel()
+    model.addObjects(copyObjects(startupObjects(5000)))
+
+    # the lookups number.py and light.py make while creating the entities
+    def run():
+        for obj in model.objectList:
+            if obj.objtype == "CHEM" or obj.objtype == "CIRCUIT":
+                model.getByType("BODY")
+            if obj.isALightShow or obj.objtype == "PMPCIRC":
+                model.getChildren(obj)
+
+    return measure(run, repeat=3)
+
+
+@benchmark("PoolObject.getValue (per state read)")
+def benchGetValue():
+    model = PoolModel()
+    model.addObjects(fullObjects(system(100)))
+    pump = model.getByType("PUMP")[0]
+
+    # what a pump sensor rounding its RPM does on every state read
+    def run():
+        value = pump.getValue("RPM")
+        return str(int(round(value / 5) * 5))
+
+    return measure(run)
+
+
+# ---------------------------------------------------------------------------
+# controller
+
+
+async def _start(size: int, repeat: int) -> float:
+    simulator = IntelliCenterSimulator(port=0, numObjects=size, seed=size)
+    await simulator.start()
+    best = None
+    try:
+        for _ in range(repeat):
+            controller = ModelController(
+                "127.0.0.1",
+                PoolModel(),
+                port=simulator.port,
+                loop=asyncio.get_running_loop(),
+            )
+            start = time.perf_counter()
+            await controller.start()
+            elapsed = time.perf_counter() - start
+            controller.stop()
+            best = elapsed if best is None else min(best, elapsed)
+    finally:
+        await simulator.stop()
+    return best
+
+
+async def _snapshot(size: int) -> dict:
+    simulator = IntelliCenterSimulator(port=0, numObjects=size, seed=size)
+    await simulator.start()
+    controller = ModelController(
+        "127.0.0.1", PoolModel(), port=simulator.port, loop=asyncio.get_running_loop()
+    )
+    await controller.start()
+    controller.stop()
+    await simulator.stop()
+    # as it comes back from the storage
+    return json.loads(json.dumps(controller.snapshot()))
+
+
+def _controllerBenchmarks(size: int):
+    @benchmark(f"controller.start {size}")
+    def benchStart():
+        return asyncio.run(_start(size, 3))
+
+    @benchmark(f"controller.restore {size} (warm start)")
+    def benchRestore():
+        snapshot = asyncio.run(_snapshot(size))
+        return measure(
+            lambda: ModelController("bench", PoolModel()).restore(snapshot), repeat=3
+        )
+
+
+for _size in SIZES:
+    _controllerBenchmarks(_size)
+
+
+# ---------------------------------------------------------------------------
+# fan-out
+
+
+class Entity:
+    """Stand in for a PoolEntity, see its _update_callback."""
+
+    def __init__(self, objnam: str, attribute: str):
+        self._objnam = objnam
+        self._attribute_key = attribute
+        self.writes = 0
+
+    def dependencies(self) -> dict:
+        return {self._objnam: {self._attribute_key}}
+
+    def isUpdated(self, updates: dict) -> bool:
+        return self._attribute_key in updates.get(self._objnam, {})
+
+    def _update_callback(self, updates: dict) -> None:
+        if self.isUpdated(updates):
+            self.writes += 1
+
+
+def _fanout(count: int):
+    """Return a controller, count entities of its model and updates to apply."""
+    sim = system(max(100, count // 2))
+    model = PoolModel()
+    model.addObjects(fullObjects(sim))
+    rnd = random.Random(count)
+    objects = list(model.objectList)
+    entities = []
+    while len(entities) < count:
+        obj = rnd.choice(objects)
+        entities.append(Entity(obj.objnam, rnd.choice(obj.attributes)))
+    return ModelController("bench", model), entities, changeCycle(sim, 100)
+
+
+def _fanoutBenchmarks(count: int):
+    @benchmark(f"fan-out to {count} entities (per update)")
+    def benchFanout():
+        controller, entities, updates = _fanout(count)
+        # what the dispatcher does: every entity gets every update
+        targets = [entity._update_callback for entity in entities]
+        controller._updatedCallback = lambda _, updates: [
+            target(updates) for target in targets
+        ]
+
+        def run():
+            for changes in updates:
+                controller._applyUpdates(changes)
+
+        return measure(run) / len(updates)
+
+    @benchmark(f"fan-out routed to {count} entities (per update)")
+    def benchRoutedFanout():
+        controller, entities, updates = _fanout(count)
+        # what the integration does: only the entities concerned are called
+        router = UpdateRouter()
+        for entity in entities:
+            router.subscribe(entity.dependencies(), entity._update_callback)
+        controller._updatedCallback = lambda _, updates: router.route(updates)
+
+        def run():
+            for changes in updates:
+                controller._applyUpdates(changes)
+
+        return measure(run) / len(updates)
+
+
+for _size in FANOUT_SIZES:
+    _fanoutBenchmarks(_size)
+
+
+# ---------------------------------------------------------------------------
+
+
+def git(*args) -> str:
+    """Return the output of a git command, None if it fails."""
+    try:
+        return subprocess.run(
+            ["git", *args], cwd=ROOT, check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def version() -> str:
+    """Return the version of the integration."""
+    with open(os.path.join(INTEGRATION_DIR, "manifest.json")) as manifest:
+        return json.load(manifest)["version"]
+
+
+def compare(baseline: dict, results: dict) -> None:
+    """Print the results next to a baseline."""
+    print(f"\n{'benchmark':56} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    for name, current in results["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            print(f"{name:56} {'-':>12} {current['us']:12.2f}")
+            continue
+        ratio = current["us"] / previous["us"]
+        flag = "  <-- slower" if ratio > 1.1 else ""
+        print(
+            f"{name:56} {previous['us']:12.2f} {current['us']:12.2f} {ratio:7.2f}{flag}"
+        )
+
+
+def main():
+    """Run the benchmarks and save the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filter", help="only run the benchmarks containing TEXT")
+    parser.add_argument("--output", help="where to write the results")
+    parser.add_argument("--compare", help="results of a previous run to compare to")
+    args = parser.parse_args()
+
+    revision = git("rev-parse", "--short", "HEAD")
+    results = {
+        "meta": {
+            "version": version(),
+            "revision": revision,
+            "dirty": bool(git("status", "--porcelain", "--", "custom_components")),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "codec": codec.CODEC_NAME,
+        },
+        "results": {},
+    }
+
+    for name, function in BENCHMARKS.items():
+        if args.filter and args.filter not in name:
+            continue
+        seconds = function()
+        results["results"][name] = {"us": seconds * 1e6}
+        print(f"{name:56} {seconds * 1e6:12.2f} us")
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{version()}-{revision}.json")
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
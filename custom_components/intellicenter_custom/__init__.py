@@ -4,27 +4,39 @@ import asyncio
 import logging
 from typing import Any, Optional
 
-from homeassistant.components.binary_sensor import DOMAIN as BINARY_SENSOR_DOMAIN
-from homeassistant.components.light import DOMAIN as LIGHT_DOMAIN
-from homeassistant.components.number import DOMAIN as NUMBER_DOMAIN
-from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
-from homeassistant.components.switch import DOMAIN as SWITCH_DOMAIN
-from homeassistant.components.water_heater import DOMAIN as WATER_HEATER_DOMAIN
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_HOST, EVENT_HOMEASSISTANT_STOP, UnitOfTemperature
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers import config_validation as cv, dispatcher
 from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.typing import ConfigType
 
 
 from .const import (
+    CONF_DEADBANDS,
     CONF_FORCE_RECONNECT_INTERVAL,
+    CONF_HEARTBEAT_IDLE,
+    CONF_MAX_IN_FLIGHT,
+    CONF_MAX_STALENESS,
+    CONF_MIN_UPDATE_INTERVAL,
     CONF_RECONNECT_INTERVAL,
+    CONF_WRITE_WINDOW,
+    DEFAULT_DEADBANDS,
     DEFAULT_FORCE_RECONNECT_INTERVAL,
+    DEFAULT_HEARTBEAT_IDLE,
+    DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_MAX_STALENESS,
+    DEFAULT_MIN_UPDATE_INTERVAL,
+    CONF_ROTATE_CONNECTION,
     DEFAULT_RECONNECT_INTERVAL,
+    DEFAULT_ROTATE_CONNECTION,
+    DEFAULT_WRITE_WINDOW,
     DOMAIN,
+    PLATFORMS,
+    SNAPSHOT_SAVE_DELAY,
+    SNAPSHOT_STORAGE_VERSION,
 )
 from .pyintellicenter import (
     ACT_ATTR,
@@ -43,6 +55,7 @@ from .pyintellicenter import (
     LOTMP_ATTR,
     LSTTMP_ATTR,
     MODE_ATTR,
+    PROPNAME_ATTR,
     PUMP_TYPE,
     PWR_ATTR,
     RPM_ATTR,
@@ -55,27 +68,21 @@ from .pyintellicenter import (
     SYSTEM_TYPE,
     USE_ATTR,
     VACFLO_ATTR,
+    VER_ATTR,
     VOL_ATTR,
     ConnectionHandler,
     ModelController,
     PoolModel,
     PoolObject,
+    UpdateFilter,
+    UpdateRouter,
+    parseRules,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
 CONFIG_SCHEMA = cv.empty_config_schema(DOMAIN)
 
-# here is the list of platforms we support
-PLATFORMS = [
-    LIGHT_DOMAIN,
-    SENSOR_DOMAIN,
-    SWITCH_DOMAIN,
-    BINARY_SENSOR_DOMAIN,
-    WATER_HEATER_DOMAIN,
-    NUMBER_DOMAIN,
-]
-
 # -------------------------------------------------------------------------------------
 
 
@@ -104,11 +111,26 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         PUMP_TYPE: {SNAME_ATTR, STATUS_ATTR, PWR_ATTR, RPM_ATTR, GPM_ATTR},
         SENSE_TYPE: {SNAME_ATTR, SOURCE_ATTR},
         SCHED_TYPE: {SNAME_ATTR, ACT_ATTR, VACFLO_ATTR},
-        SYSTEM_TYPE: {MODE_ATTR, VACFLO_ATTR},
+        SYSTEM_TYPE: {MODE_ATTR, PROPNAME_ATTR, VACFLO_ATTR, VER_ATTR},
     }
     model = PoolModel(attributes_map)
 
-    controller = ModelController(entry.data[CONF_HOST], model, loop=hass.loop)
+    controller = ModelController(
+        entry.data[CONF_HOST],
+        model,
+        loop=hass.loop,
+        maxInFlight=entry.options.get(CONF_MAX_IN_FLIGHT, DEFAULT_MAX_IN_FLIGHT),
+        updateFilter=_updateFilter(entry),
+    )
+
+    # the model of the last session lets us create the entities right away
+    # the controller reconciles it with the live system once connected
+    store = _snapshotStore(hass, entry)
+    try:
+        restored = controller.restore(await store.async_load(), entry.unique_id)
+    except Exception as err:
+        _LOGGER.warning(f"ignoring snapshot of {entry.title}: {err}")
+        restored = False
 
     class Handler(ConnectionHandler):
         def __init__(
@@ -128,11 +150,29 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             ),
         ):
             """Initialize the handler."""
-            super().__init__(controller, timeBetweenReconnects)
+            super().__init__(
+                controller,
+                timeBetweenReconnects,
+                rotateConnection=entry.options.get(
+                    CONF_ROTATE_CONNECTION, DEFAULT_ROTATE_CONNECTION
+                ),
+                heartbeatIdle=entry.options.get(
+                    CONF_HEARTBEAT_IDLE, DEFAULT_HEARTBEAT_IDLE
+                ),
+            )
             self.controller = controller
             self._entry = entry
             self._hass = hass
-            self.UPDATE_SIGNAL = DOMAIN + "_UPDATE_" + entry.entry_id
+            # the updates go to the entities depending on what changed
+            self.router = UpdateRouter()
+            # platform -> the batcher of its state writes, if enabled
+            self.batchers = {}
+            for platform in PLATFORMS:
+                window = entry.options.get(
+                    f"{CONF_WRITE_WINDOW}_{platform}", DEFAULT_WRITE_WINDOW
+                )
+                if window:
+                    self.batchers[platform] = WriteBatcher(hass, window / 1000)
             self.CONNECTION_SIGNAL = DOMAIN + "_CONNECTION_" + entry.entry_id
             _LOGGER.info(
                 "Initializing ConnectionHandler with improved connection management v1.0"
@@ -140,6 +180,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             self._force_reconnect_interval = force_reconnect_interval
             self._last_successful_connection = None
             self._periodic_reconnect_task = None
+            # True once the entities have been created from a snapshot
+            self.platforms_loaded = False
 
         def started(self, controller):
             """Handle the first time the controller is started."""
@@ -148,19 +190,47 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             for object in controller.model:
                 _LOGGER.debug(f"   loaded {object}")
 
-            async def setup_platforms():
-                """Set up platforms."""
-                await self._hass.config_entries.async_forward_entry_setups(
-                    self._entry, PLATFORMS
+            if not self.platforms_loaded:
+
+                async def setup_platforms():
+                    """Set up platforms."""
+                    await self._hass.config_entries.async_forward_entry_setups(
+                        self._entry, PLATFORMS
+                    )
+                    # the entities are created: drop what none of them tracks
+                    controller.trackOnly()
+
+                self._hass.async_create_task(setup_platforms())
+
+            elif controller.topologyChanged:
+
+                async def reload():
+                    """Recreate the entities from the live model."""
+                    await store.async_save(controller.snapshot())
+                    await self._hass.config_entries.async_reload(self._entry.entry_id)
+
+                self._hass.async_create_task(reload())
+                return
+
+            else:
+                # the entities created from the snapshot are now live
+                dispatcher.async_dispatcher_send(
+                    self._hass, self.CONNECTION_SIGNAL, True
                 )
 
-            self._hass.async_create_task(setup_platforms())
+            store.async_delay_save(controller.snapshot, SNAPSHOT_SAVE_DELAY)
 
         @callback
         def reconnected(self, controller):
             """Handle reconnection from the Pentair system."""
             _LOGGER.info(f"reconnected to system: '{controller.systemInfo.propName}'")
             dispatcher.async_dispatcher_send(self._hass, self.CONNECTION_SIGNAL, True)
+            store.async_delay_save(controller.snapshot, SNAPSHOT_SAVE_DELAY)
+
+        @callback
+        def rotated(self, controller):
+            """Handle the connection being replaced, entities stay available."""
+            store.async_delay_save(controller.snapshot, SNAPSHOT_SAVE_DELAY)
 
         @callback
         def disconnected(self, controller, exc):
@@ -173,8 +243,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         @callback
         def updated(self, controller, updates: dict[str, PoolObject]):
             """Handle updates from the Pentair system."""
-            _LOGGER.debug(f"received update for {len(updates)} pool objects")
-            dispatcher.async_dispatcher_send(self._hass, self.UPDATE_SIGNAL, updates)
+            _LOGGER.debug("received update for %d pool objects", len(updates))
+            self.router.route(updates)
 
     try:
         handler = Handler(
@@ -185,11 +255,17 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             force_reconnect_interval=3600,  # force reconnect every hour
         )
 
-        await handler.start()
-
         hass.data.setdefault(DOMAIN, {})
         hass.data[DOMAIN][entry.entry_id] = handler
 
+        if restored:
+            await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+            handler.platforms_loaded = True
+            # only subscribe to what the entities (enabled ones) track
+            controller.trackOnly()
+
+        await handler.start()
+
         async def on_hass_stop(event):
             """Stop push updates when hass stops."""
             handler.stop()
@@ -229,6 +305,70 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return True
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the data stored for a config entry."""
+    await _snapshotStore(hass, entry).async_remove()
+
+
+def _snapshotStore(hass: HomeAssistant, entry: ConfigEntry) -> Store:
+    """Return the storage of the model snapshot of a config entry."""
+    return Store(hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.snapshot.{entry.entry_id}")
+
+
+def _updateFilter(entry: ConfigEntry) -> Optional[UpdateFilter]:
+    """Return the filter of the noisy attributes configured (if any)."""
+    try:
+        rules = parseRules(
+            entry.options.get(CONF_DEADBANDS, DEFAULT_DEADBANDS),
+            minInterval=entry.options.get(
+                CONF_MIN_UPDATE_INTERVAL, DEFAULT_MIN_UPDATE_INTERVAL
+            ),
+            maxStaleness=entry.options.get(CONF_MAX_STALENESS, DEFAULT_MAX_STALENESS),
+        )
+    except ValueError as err:
+        _LOGGER.error(f"ignoring the deadbands configured: {err}")
+        return None
+    return UpdateFilter(rules) if rules else None
+
+
+# -------------------------------------------------------------------------------------
+
+
+class WriteBatcher:
+    """Coalesce the state writes of entities updated in bursts.
+
+    an entity marked dirty is written once at the end of the current
+    window, with the latest state of its pool object, however many
+    updates it received in between
+    """
+
+    def __init__(self, hass: HomeAssistant, window: float):
+        """Initialize a batcher flushing every window seconds."""
+        self._hass = hass
+        self._window = window
+        # the entities to write, in the order they were updated
+        self._dirty: dict[Entity, None] = {}
+        self._handle = None
+
+    def schedule(self, entity: Entity) -> None:
+        """Write the state of an entity at the end of the current window."""
+        self._dirty[entity] = None
+        if self._handle is None:
+            self._handle = self._hass.loop.call_later(self._window, self._flush)
+
+    def discard(self, entity: Entity) -> None:
+        """Forget a pending write, typically for an entity being removed."""
+        self._dirty.pop(entity, None)
+
+    @callback
+    def _flush(self) -> None:
+        """Write the state of all the entities updated during the window."""
+        self._handle = None
+        dirty, self._dirty = self._dirty, {}
+        for entity in dirty:
+            entity.async_write_ha_state()
+
+
 # -------------------------------------------------------------------------------------
 
 
@@ -259,16 +399,30 @@ class PoolEntity(Entity):
         self._attr_native_unit_of_measurement = unit_of_measurement
         self._attr_icon = icon
         self._attr_should_poll = False
-
-        _LOGGER.debug(f"mapping {poolObject}")
+        # True while the state comes from the snapshot of the last session
+        self._restored = controller.restored
+        # set when the state writes of the platform are batched
+        self._batcher: Optional[WriteBatcher] = None
+        # computed on first use, until the attributes they show change
+        self._shown = frozenset()
+        self._cachedName = None
+        self._cachedStateAttributes = None
+        self._cachedDeviceInfo = None
+
+        _LOGGER.debug("mapping %s", poolObject)
 
     async def async_added_to_hass(self):
         """Entity is added to Home Assistant."""
-        self.async_on_remove(
-            dispatcher.async_dispatcher_connect(
-                self.hass, DOMAIN + "_UPDATE_" + self._entry_id, self._update_callback
-            )
-        )
+        handler = self.hass.data[DOMAIN][self._entry_id]
+        self._shown = frozenset(self.shownAttributes())
+        # disabled entities are never added: nothing subscribes for them
+        tracked = self.trackedAttributes()
+        self.async_on_remove(handler.router.subscribe(tracked, self._update_callback))
+        self._controller.track(tracked)
+        self.async_on_remove(lambda: self._controller.untrack(tracked))
+        self._batcher = handler.batchers.get(self.platform.domain)
+        if self._batcher:
+            self.async_on_remove(lambda: self._batcher.discard(self))
 
         self.async_on_remove(
             dispatcher.async_dispatcher_connect(
@@ -286,14 +440,16 @@ class PoolEntity(Entity):
     def name(self):
         """Return the name of the entity."""
 
-        if self._attr_name is None:
-            # default is to return the name of the underlying pool object
-            return self._poolObject.sname
-        elif self._attr_name.startswith("+"):
-            # name is a suffix
-            return self._poolObject.sname + self._attr_name[1:]
-        else:
-            return self._attr_name
+        if self._cachedName is None:
+            if self._attr_name is None:
+                # default is to return the name of the underlying pool object
+                self._cachedName = self._poolObject.sname
+            elif self._attr_name.startswith("+"):
+                # name is a suffix
+                self._cachedName = self._poolObject.sname + self._attr_name[1:]
+            else:
+                self._cachedName = self._attr_name
+        return self._cachedName
 
     @property
     def unique_id(self):
@@ -309,17 +465,34 @@ class PoolEntity(Entity):
 
         systemInfo = self._controller.systemInfo
 
-        return {
-            "identifiers": {(DOMAIN, self._entry_id)},
-            "manufacturer": "Pentair",
-            "model": "IntelliCenter",
-            "name": systemInfo.propName,
-            "sw_version": systemInfo.swVersion,
-        }
+        # rebuilt when the PROPNAME or VER of the system changes
+        cached = self._cachedDeviceInfo
+        if (
+            cached is None
+            or cached["name"] != systemInfo.propName
+            or cached["sw_version"] != systemInfo.swVersion
+        ):
+            self._cachedDeviceInfo = cached = {
+                "identifiers": {(DOMAIN, self._entry_id)},
+                "manufacturer": "Pentair",
+                "model": "IntelliCenter",
+                "name": systemInfo.propName,
+                "sw_version": systemInfo.swVersion,
+            }
+        return cached
 
     @property
     def extra_state_attributes(self) -> Optional[dict[str, Any]]:
-        """Return the state attributes of the entity."""
+        """Return the state attributes of the entity.
+
+        the dictionary is reused until the attributes it shows change
+        """
+        if self._cachedStateAttributes is None:
+            self._cachedStateAttributes = self._stateAttributes()
+        return self._cachedStateAttributes
+
+    def _stateAttributes(self) -> dict[str, Any]:
+        """Compute the state attributes of the entity."""
 
         object = self._poolObject
 
@@ -329,6 +502,9 @@ class PoolEntity(Entity):
 
         attributes = {"OBJNAM": object.objnam, "OBJTYPE": objectType}
 
+        if self._restored:
+            attributes["restored"] = True
+
         if object.status:
             attributes["Status"] = object.status
 
@@ -342,11 +518,32 @@ class PoolEntity(Entity):
         """Request changes as key:value pairs to the associated Pool object."""
         # since we don't care about waiting for the response we set waitForResponse to False
         # whatever changes were requested will be reflected as an update if successful
-        # (also I found out there is no event loop in that thread for a Future would fail)
-        self._controller.requestChanges(
-            self._poolObject.objnam, changes, waitForResponse=False
+        # the synchronous services run in a worker thread but the controller
+        # (its flow control and timers) must only be used from the event loop
+        self.hass.loop.call_soon_threadsafe(
+            self._controller.requestChanges, self._poolObject.objnam, changes, False
         )
 
+    def dependencies(self) -> dict[str, set[str]]:
+        """Return the attributes, by objnam, the state of the entity depends on.
+
+        only the updates changing one of them reach isUpdated
+        """
+        return {self._poolObject.objnam: {self._attribute_key}}
+
+    def shownAttributes(self) -> set[str]:
+        """Return the attributes of the pool object shown by the entity."""
+        return {SNAME_ATTR, STATUS_ATTR, SUBTYP_ATTR, *self._extra_state_attributes}
+
+    def trackedAttributes(self) -> dict[str, set[str]]:
+        """Return the attributes, by objnam, the controller must keep up to date.
+
+        the dependencies and what the entity shows in its name and attributes
+        """
+        tracked = {objnam: set(keys) for objnam, keys in self.dependencies().items()}
+        tracked.setdefault(self._poolObject.objnam, set()).update(self._shown)
+        return tracked
+
     def isUpdated(self, updates: dict[str, dict[str, str]]) -> bool:
         """Return true if the entity is updated by the updates from Intellicenter."""
 
@@ -356,20 +553,51 @@ class PoolEntity(Entity):
     def _update_callback(self, updates: dict[str, dict[str, str]]):
         """Update the entity if its underlying pool object has changed."""
 
-        if self.isUpdated(updates):
+        updated = self.isUpdated(updates)
+        if self._invalidate(updates) or updated:
             self._attr_available = True
-            _LOGGER.debug(f"updating {self} from {updates}")
-            self.async_write_ha_state()
+            self._setRestored(self._controller.restored)
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug("updating %s from %s", self, updates)
+            if self._batcher:
+                self._batcher.schedule(self)
+            else:
+                self.async_write_ha_state()
+
+    def _invalidate(self, updates: dict[str, dict[str, str]]) -> bool:
+        """Forget what was computed from the attributes updated, return True if any."""
+        changes = updates.get(self._poolObject.objnam)
+        if not changes or self._shown.isdisjoint(changes):
+            return False
+        if SNAME_ATTR in changes:
+            self._cachedName = None
+        self._cachedStateAttributes = None
+        return True
+
+    def _setRestored(self, restored: bool) -> None:
+        """Record whether the state comes from the snapshot of the last session."""
+        if restored != self._restored:
+            self._restored = restored
+            self._cachedStateAttributes = None
 
     @callback
     def _connection_callback(self, is_connected):
         """Mark the entity as unavailable after being disconnected from the server."""
         if is_connected:
-            self._poolObject = self._controller.model[self._poolObject.objnam]
+            poolObject = self._controller.model[self._poolObject.objnam]
+            if poolObject is not self._poolObject:
+                # replaced when the model was reconciled with the live system
+                self._cachedName = None
+                self._cachedStateAttributes = None
+            self._poolObject = poolObject
             if not self._poolObject:
                 # this is for the rare case where the object the entity is mapped to
                 # had been removed from the Pentair system while we were disconnected
                 return
+            if self._attr_available and not self._restored:
+                # already refreshed by an update received while resynchronizing
+                return
+        self._setRestored(self._controller.restored)
         self._attr_available = is_connected
         self.async_write_ha_state()
 
@@ -2,20 +2,22 @@
 
 import logging
 
-from custom_components.intellicenter.pyintellicenter.attributes import (
-    BODY_ATTR,
-    CIRCUIT_TYPE,
-    HEATER_TYPE,
-)
-from custom_components.intellicenter.water_heater import HEATER_ATTR, HTMODE_ATTR
-
 from homeassistant.components.binary_sensor import BinarySensorEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 
 from . import PoolEntity
 from .const import DOMAIN
-from .pyintellicenter import STATUS_ATTR, ModelController, PoolObject
+from .pyintellicenter import (
+    BODY_ATTR,
+    CIRCUIT_TYPE,
+    HEATER_ATTR,
+    HEATER_TYPE,
+    HTMODE_ATTR,
+    STATUS_ATTR,
+    ModelController,
+    PoolObject,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -104,7 +106,7 @@ class HeaterBinarySensor(PoolEntity, BinarySensorEntity):
     ):
         """Initialize."""
         super().__init__(entry, controller, poolObject, **kwargs)
-        self._bodies = set(poolObject[BODY_ATTR].split(" "))
+        self._bodies = set(poolObject.references(BODY_ATTR))
         self._attr_icon = "mdi:fire-circle"
 
     @property
@@ -120,6 +122,13 @@ class HeaterBinarySensor(PoolEntity, BinarySensorEntity):
                 return True
         return False
 
+    def dependencies(self) -> dict[str, set[str]]:
+        """Return the attributes, by objnam, the state of the entity depends on."""
+        # the heater is on when one of its bodies is heating with it
+        return {
+            objnam: {STATUS_ATTR, HEATER_ATTR, HTMODE_ATTR} for objnam in self._bodies
+        }
+
     def isUpdated(self, updates: dict[str, dict[str, str]]) -> bool:
         """Return true if the entity is updated by the updates from Intellicenter."""
 
@@ -12,10 +12,25 @@ from .const import (
     DOMAIN,
     CONF_RECONNECT_INTERVAL,
     CONF_FORCE_RECONNECT_INTERVAL,
+    CONF_MAX_IN_FLIGHT,
+    CONF_ROTATE_CONNECTION,
+    CONF_HEARTBEAT_IDLE,
+    CONF_WRITE_WINDOW,
+    CONF_DEADBANDS,
+    CONF_MIN_UPDATE_INTERVAL,
+    CONF_MAX_STALENESS,
     DEFAULT_RECONNECT_INTERVAL,
     DEFAULT_FORCE_RECONNECT_INTERVAL,
+    DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_ROTATE_CONNECTION,
+    DEFAULT_HEARTBEAT_IDLE,
+    DEFAULT_WRITE_WINDOW,
+    DEFAULT_DEADBANDS,
+    DEFAULT_MIN_UPDATE_INTERVAL,
+    DEFAULT_MAX_STALENESS,
+    PLATFORMS,
 )
-from .pyintellicenter import BaseController, SystemInfo
+from .pyintellicenter import BaseController, SystemInfo, parseRules
 
 from homeassistant.core import callback
 
@@ -26,6 +41,15 @@ class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
 
 
+def _deadbands(value: str) -> str:
+    """Validate a specification of deadbands like 'PWR=25 ORPVAL=2%'."""
+    try:
+        parseRules(value)
+    except ValueError as err:
+        raise vol.Invalid(str(err)) from err
+    return value
+
+
 class ConfigFlow(ConfigFlow, domain=DOMAIN):
     """Pentair Intellicenter config flow."""
 
@@ -217,6 +241,56 @@ class OptionsFlowHandler(OptionsFlow):
                             ),
                         ),
                     ): int,
+                    vol.Optional(
+                        CONF_MAX_IN_FLIGHT,
+                        default=config_entry.options.get(
+                            CONF_MAX_IN_FLIGHT, DEFAULT_MAX_IN_FLIGHT
+                        ),
+                    ): vol.All(int, vol.Range(min=1, max=16)),
+                    vol.Optional(
+                        CONF_ROTATE_CONNECTION,
+                        default=config_entry.options.get(
+                            CONF_ROTATE_CONNECTION, DEFAULT_ROTATE_CONNECTION
+                        ),
+                    ): bool,
+                    vol.Optional(
+                        CONF_HEARTBEAT_IDLE,
+                        default=config_entry.options.get(
+                            CONF_HEARTBEAT_IDLE, DEFAULT_HEARTBEAT_IDLE
+                        ),
+                    ): vol.All(int, vol.Range(min=5, max=600)),
+                    # the window (in ms) over which the state writes of the
+                    # entities of a platform are coalesced, 0 to disable
+                    **{
+                        vol.Optional(
+                            f"{CONF_WRITE_WINDOW}_{platform}",
+                            default=config_entry.options.get(
+                                f"{CONF_WRITE_WINDOW}_{platform}",
+                                DEFAULT_WRITE_WINDOW,
+                            ),
+                        ): vol.All(int, vol.Range(min=0, max=1000))
+                        for platform in PLATFORMS
+                    },
+                    # the changes of noisy attributes held back by the
+                    # controller, like 'PWR=25 RPM=10 ORPVAL=2%'
+                    vol.Optional(
+                        CONF_DEADBANDS,
+                        default=config_entry.options.get(
+                            CONF_DEADBANDS, DEFAULT_DEADBANDS
+                        ),
+                    ): vol.All(str, _deadbands),
+                    vol.Optional(
+                        CONF_MIN_UPDATE_INTERVAL,
+                        default=config_entry.options.get(
+                            CONF_MIN_UPDATE_INTERVAL, DEFAULT_MIN_UPDATE_INTERVAL
+                        ),
+                    ): vol.All(int, vol.Range(min=0, max=3600)),
+                    vol.Optional(
+                        CONF_MAX_STALENESS,
+                        default=config_entry.options.get(
+                            CONF_MAX_STALENESS, DEFAULT_MAX_STALENESS
+                        ),
+                    ): vol.All(int, vol.Range(min=0, max=86400)),
                 }
             ),
         )
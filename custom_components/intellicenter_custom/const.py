@@ -1,6 +1,22 @@
 """Constants for the Pentair Intelicenter integraion."""
 
+from homeassistant.components.binary_sensor import DOMAIN as BINARY_SENSOR_DOMAIN
+from homeassistant.components.light import DOMAIN as LIGHT_DOMAIN
+from homeassistant.components.number import DOMAIN as NUMBER_DOMAIN
+from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
+from homeassistant.components.switch import DOMAIN as SWITCH_DOMAIN
+from homeassistant.components.water_heater import DOMAIN as WATER_HEATER_DOMAIN
+
 DOMAIN = "intellicenter_custom"
+# here is the list of platforms we support
+PLATFORMS = [
+    LIGHT_DOMAIN,
+    SENSOR_DOMAIN,
+    SWITCH_DOMAIN,
+    BINARY_SENSOR_DOMAIN,
+    WATER_HEATER_DOMAIN,
+    NUMBER_DOMAIN,
+]
 DEVICE_CLASS_ROTATION_SPEED = "rotational_speed"
 CONST_RPM = "rpm"  # rotation per minute
 CONST_GPM = "gpm"  # gallon per minute
@@ -8,3 +24,22 @@ CONF_RECONNECT_INTERVAL = "reconnect_interval"
 CONF_FORCE_RECONNECT_INTERVAL = "force_reconnect_interval"
 DEFAULT_RECONNECT_INTERVAL = 30
 DEFAULT_FORCE_RECONNECT_INTERVAL = 3600
+CONF_MAX_IN_FLIGHT = "max_in_flight"
+DEFAULT_MAX_IN_FLIGHT = 1
+CONF_ROTATE_CONNECTION = "rotate_connection"
+DEFAULT_ROTATE_CONNECTION = True
+CONF_HEARTBEAT_IDLE = "heartbeat_idle"
+DEFAULT_HEARTBEAT_IDLE = 10  # seconds
+# per platform: the option is CONF_WRITE_WINDOW + "_" + the platform
+CONF_WRITE_WINDOW = "write_window"
+DEFAULT_WRITE_WINDOW = 0  # milliseconds, 0 writes the states immediately
+# the changes of noisy attributes held back by the controller
+# like 'PWR=25 RPM=10 ORPVAL=2%', see pyintellicenter.deadband.parseRules
+CONF_DEADBANDS = "deadbands"
+DEFAULT_DEADBANDS = ""
+CONF_MIN_UPDATE_INTERVAL = "min_update_interval"
+DEFAULT_MIN_UPDATE_INTERVAL = 0  # seconds, 0 for no rate limiting
+CONF_MAX_STALENESS = "max_staleness"
+DEFAULT_MAX_STALENESS = 300  # seconds, 0 to hold changes back indefinitely
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 10  # seconds
@@ -28,5 +28,12 @@ async def async_get_config_entry_diagnostics(
     ]
 
     return {
-        "objects": objects
+        "objects": objects,
+        "connection": controller.connectionStats,
+        "subscription": controller.subscriptionStats,
+        "subscribedAttributes": controller.numSubscribed,
+        "parseErrors": dict(controller.model.parseErrors),
+        "updateFilter": controller.updateFilter.stats
+        if controller.updateFilter
+        else None,
     }
@@ -138,6 +138,10 @@ class PoolLight(PoolEntity, LightEntity):
 
         self.requestChanges(changes)
 
+    def dependencies(self) -> dict[str, set[str]]:
+        """Return the attributes, by objnam, the state of the entity depends on."""
+        return {self._poolObject.objnam: {STATUS_ATTR, USE_ATTR}}
+
     def isUpdated(self, updates: dict[str, dict[str, str]]) -> bool:
         """Return true if the entity is updated by the updates from Intellicenter."""
 
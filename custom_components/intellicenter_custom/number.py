@@ -37,43 +37,33 @@ async def async_setup_entry(
     numbers = []
 
     obj: PoolObject
-    for obj in controller.model.objectList:
-        if (
-            obj.objtype == CHEM_TYPE
-            and obj.subtype == "ICHLOR"
-            and PRIM_ATTR in obj.attributes
-        ):
-            bodies = controller.model.getByType(BODY_TYPE)
+    for obj in controller.model.getByType(CHEM_TYPE, "ICHLOR"):
+        if PRIM_ATTR in obj.attributes:
             intellichlor_bodies = obj[BODY_ATTR].split(" ")
 
             _LOGGER.debug(f"Intellichlor bodies found: {intellichlor_bodies}")
 
-            body: PoolObject
-            for body in bodies:
+            # the output for the first body is PRIM, for the second one SEC
+            for attribute_key, objnam in zip(
+                (PRIM_ATTR, SEC_ATTR), intellichlor_bodies
+            ):
+                body = controller.model[objnam]
                 # Only create controls for bodies that have ICHLOR support
-                if body.objnam not in intellichlor_bodies:
+                if not body or body.objtype != BODY_TYPE:
                     _LOGGER.debug(
-                        f"Skipping Intellichlor control for body '{body.objnam}' - not in configured list: {intellichlor_bodies}"
+                        f"Skipping Intellichlor control for '{objnam}' - not a body"
                     )
                     continue
-
-                intellichlor_index = intellichlor_bodies.index(body.objnam)
-                attribute_key = None
-                if intellichlor_index == 0:
-                    attribute_key = PRIM_ATTR
-                elif intellichlor_index == 1:
-                    attribute_key = SEC_ATTR
-                if attribute_key is not None:
-                    numbers.append(
-                        PoolNumber(
-                            entry,
-                            controller,
-                            obj,
-                            unit_of_measurement=PERCENTAGE,
-                            attribute_key=attribute_key,
-                            name=f"+ Output % ({body.sname})",
-                        )
+                numbers.append(
+                    PoolNumber(
+                        entry,
+                        controller,
+                        obj,
+                        unit_of_measurement=PERCENTAGE,
+                        attribute_key=attribute_key,
+                        name=f"+ Output % ({body.sname})",
                     )
+                )
 
     async_add_entities(numbers)
 
@@ -104,7 +94,7 @@ class PoolNumber(PoolEntity, NumberEntity):
     @property
     def native_value(self) -> float:
         """Return the current value."""
-        return self._poolObject[self._attribute_key]
+        return self._poolObject.getValue(self._attribute_key)
 
     def set_native_value(self, value: float) -> None:
         """Update the current value."""
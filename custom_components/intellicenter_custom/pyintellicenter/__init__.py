@@ -66,7 +66,10 @@ from .controller import (
     ModelController,
     SystemInfo,
 )
+from .deadband import FilterRule, UpdateFilter, parseRules
 from .model import PoolModel, PoolObject
+from .protocol import PRIORITY_BULK, PRIORITY_INTERACTIVE, PRIORITY_QUERY
+from .router import ANY_ATTRIBUTE, UpdateRouter
 
 __all__ = [
     BaseController,
@@ -74,8 +77,16 @@ __all__ = [
     ConnectionHandler,
     ModelController,
     SystemInfo,
+    FilterRule,
+    UpdateFilter,
+    parseRules,
     PoolModel,
     PoolObject,
+    PRIORITY_BULK,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_QUERY,
+    ANY_ATTRIBUTE,
+    UpdateRouter,
     BODY_TYPE,
     CHEM_TYPE,
     CIRCUIT_TYPE,
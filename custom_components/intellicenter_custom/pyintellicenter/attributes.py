@@ -452,3 +452,43 @@ ALL_ATTRIBUTES_BY_TYPE = {
     "SYSTIM": SYSTIM_ATTRIBUTES,
     "VALVE": VALVE_ATTRIBUTES,
 }
+
+# the attributes whose value is the objnam of another object
+# or a list of them separated by spaces (see PoolModel.getReferrers)
+REFERENCE_ATTRIBUTES = frozenset([BODY_ATTR, CIRCUIT_ATTR, "FILTER", HEATER_ATTR])
+
+# the type of the value of an attribute, as returned by PoolObject.getValue
+# (the system sends everything as strings), attributes not listed stay strings
+INT_VALUE = "int"
+FLOAT_VALUE = "float"
+BOOL_VALUE = "bool"  # ON/OFF
+OBJNAMS_VALUE = "objnams"  # a tuple of the objnams, without the null one
+TIME_VALUE = "time"  # 'HH,MM,SS' as a (hours, minutes, seconds) tuple
+
+ATTRIBUTE_TYPES = {
+    FEATR_ATTR: BOOL_VALUE,
+    GPM_ATTR: INT_VALUE,
+    HTMODE_ATTR: INT_VALUE,
+    LISTORD_ATTR: INT_VALUE,
+    LOTMP_ATTR: FLOAT_VALUE,
+    LSTTMP_ATTR: FLOAT_VALUE,
+    ORPTNK_ATTR: INT_VALUE,
+    ORPVAL_ATTR: INT_VALUE,
+    PHTNK_ATTR: INT_VALUE,
+    PHVAL_ATTR: FLOAT_VALUE,
+    PRIM_ATTR: INT_VALUE,
+    PWR_ATTR: INT_VALUE,
+    QUALTY_ATTR: FLOAT_VALUE,
+    RPM_ATTR: INT_VALUE,
+    SALT_ATTR: INT_VALUE,
+    SEC_ATTR: INT_VALUE,
+    VACFLO_ATTR: BOOL_VALUE,
+    VOL_ATTR: INT_VALUE,
+    **{attribute: OBJNAMS_VALUE for attribute in REFERENCE_ATTRIBUTES},
+}
+
+# the attributes whose meaning depends on the type of the object
+ATTRIBUTE_TYPES_BY_TYPE = {
+    SCHED_TYPE: {TIME_ATTR: TIME_VALUE, TIMOUT_ATTR: TIME_VALUE},
+    SENSE_TYPE: {SOURCE_ATTR: FLOAT_VALUE},
+}
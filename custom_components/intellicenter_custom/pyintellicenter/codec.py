@@ -0,0 +1,38 @@
+"""JSON encoding and decoding of the messages exchanged with IntelliCenter.
+
+The fastest library installed is used (orjson, then ujson) with the
+standard json module as a fallback. Both directions work on bytes, which
+is what the transport deals with.
+"""
+
+import json
+
+
+def _stdlibEncode(obj) -> bytes:
+    return json.dumps(obj).encode()
+
+
+# name -> (encode, decode) for every codec available
+CODECS = {"json": (_stdlibEncode, json.loads)}
+
+try:
+    import ujson
+
+    def _ujsonEncode(obj) -> bytes:
+        return ujson.dumps(obj, ensure_ascii=False).encode()
+
+    CODECS["ujson"] = (_ujsonEncode, ujson.loads)
+except ImportError:
+    pass
+
+try:
+    import orjson
+
+    CODECS["orjson"] = (orjson.dumps, orjson.loads)
+except ImportError:
+    pass
+
+# the preferred codec which is available
+CODEC_NAME = next(name for name in ("orjson", "ujson", "json") if name in CODECS)
+
+encode, decode = CODECS[CODEC_NAME]
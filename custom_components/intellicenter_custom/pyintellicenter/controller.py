@@ -2,7 +2,10 @@
 
 import asyncio
 from asyncio import Future
+from collections import Counter, deque
+from contextvars import ContextVar
 from hashlib import blake2b
+from itertools import count
 import logging
 import traceback
 from typing import Optional
@@ -18,12 +21,36 @@ from .attributes import (
     SYSTEM_TYPE,
     VER_ATTR,
 )
+from .deadband import UpdateFilter
 from .model import PoolModel
 from .protocol import ICProtocol
+from .router import ANY_ATTRIBUTE
 
 _LOGGER = logging.getLogger(__name__)
 _LOGGER.setLevel(logging.INFO)
 
+# bounds of the size (in estimated bytes) of a subscription batch
+# the default is close to the 50 attributes per request used to be
+DEFAULT_BATCH_BYTES = 2048
+MIN_BATCH_BYTES = 256
+MAX_BATCH_BYTES = 16384
+
+# the attributes retrieved for every object on a new connection
+DISCOVERY_ATTRIBUTES = [OBJTYP_ATTR, SUBTYP_ATTR, SNAME_ATTR, PARENT_ATTR]
+
+# the attribute listing the objects of a system, to tell if they have changed
+INVENTORY_ATTRIBUTES = [OBJTYP_ATTR]
+
+# the attributes of the SYSTEM object kept up to date in the SystemInfo
+SYSTEM_INFO_ATTRIBUTES = {MODE_ATTR, PROPNAME_ATTR, VER_ATTR}
+
+# version of the format of ModelController.snapshot
+SNAPSHOT_VERSION = 1
+
+# the connection the requests of the current task go to, when it is not
+# the controller's current one (see BaseController.rotate)
+_via = ContextVar("via", default=None)
+
 
 class CommandError(Exception):
     """Represents an error in response to a Pentair request."""
@@ -52,6 +79,7 @@ class SystemInfo:
         self._propName = params[PROPNAME_ATTR]
         self._sw_version = params[VER_ATTR]
         self._mode = params[MODE_ATTR]
+        self._sname = params[SNAME_ATTR]
         # here we compute what is expected to be a unique_id
         # from the internal name of the system object
         h = blake2b(digest_size=8)
@@ -80,11 +108,23 @@ class SystemInfo:
 
     def update(self, updates):
         """Update the object from a set of key/value pairs."""
-        _LOGGER.debug(f"updating system info with {updates}")
+        _LOGGER.debug("updating system info with %s", updates)
         self._propName = updates.get(PROPNAME_ATTR, self._propName)
         self._sw_version = updates.get(VER_ATTR, self._sw_version)
         self._mode = updates.get(MODE_ATTR, self._mode)
 
+    def asDict(self) -> dict:
+        """Return the information in the format the constructor takes."""
+        return {
+            "objnam": self._objnam,
+            "params": {
+                PROPNAME_ATTR: self._propName,
+                VER_ATTR: self._sw_version,
+                MODE_ATTR: self._mode,
+                SNAME_ATTR: self._sname,
+            },
+        }
+
 
 # -------------------------------------------------------------------------------------
 
@@ -104,43 +144,171 @@ def prune(obj):
     return obj
 
 
+def _propagateResult(source: Future, target: Future) -> None:
+    """Copy the outcome of a future to another one."""
+    if target.done():
+        return
+    if source.cancelled():
+        target.cancel()
+    elif source.exception():
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+
+def _difference(attributes: dict, others: dict) -> dict:
+    """Return the attributes by objnam which are not in others."""
+    result = {}
+    for objnam, keys in attributes.items():
+        keys = keys - others.get(objnam, set())
+        if keys:
+            result[objnam] = keys
+    return result
+
+
 class BaseController:
     """A basic controller connecting to a Pentair system."""
 
-    def __init__(self, host, port=6681, loop=None):
-        """Initialize the controller."""
+    def __init__(
+        self,
+        host,
+        port=6681,
+        loop=None,
+        maxInFlight=1,
+        requestTimeout=30,
+        orphanTimeout=300,
+        recorder=None,
+        keepaliveInterval=10,
+    ):
+        """Initialize the controller.
+
+        maxInFlight is the maximum number of requests allowed on the wire
+        at the same time (1 means one request at a time)
+        requestTimeout is the default deadline (in seconds) for the requests
+        we wait a response for, orphanTimeout is how long we keep track of
+        the other ones
+        recorder is an optional TrafficRecorder capturing the traffic of
+        every connection made by the controller
+        keepaliveInterval is how long (in seconds) a connection may stay
+        quiet before being pinged, see ICProtocol._keepalive
+        """
         self._host = host
         self._port = port
         self._loop = loop
+        self._maxInFlight = maxInFlight
+        self._requestTimeout = requestTimeout
+        self._orphanTimeout = orphanTimeout
+        self._recorder = recorder
+        self._keepaliveInterval = keepaliveInterval
 
         self._transport = None
         self._protocol = None
+        self._systemInfo = None
+
+        # message IDs are unique across connections so that two of them
+        # can be open at the same time while rotating
+        self._msgIDs = count(1)
+        # the connection being opened by rotate and its initialization
+        self._incoming = None
+        self._incomingInit = None
 
         self._diconnectedCallback = None
 
+        # msg_id -> Future (or None) for the requests waiting for a response
         self._requests = {}
+        # msg_id -> (monotonic) time after which the request is dropped
+        self._deadlines = {}
+        # msg_ids of recently expired requests, to recognize late responses
+        self._expired = deque(maxlen=100)
+        self._sweeperTask = None
+        self._stats = {"expired": 0, "mismatched": 0, "late": 0}
 
     @property
     def host(self) -> str:
         """Return the host the controller is connected to."""
         return self._host
 
+    @property
+    def connectionStats(self) -> dict:
+        """Return the counters of the controller and of the current connection."""
+        stats = self._protocol.stats if self._protocol else {}
+        return {**stats, **self._stats, "pendingRequests": len(self._requests)}
+
+    @property
+    def roundTripTimes(self) -> dict:
+        """Return a summary of the ping round trip times of the current connection."""
+        return self._protocol.rtt.summary() if self._protocol else {}
+
+    @property
+    def silence(self) -> float:
+        """Return the number of seconds since the system last sent something."""
+        return self._protocol.silence if self._protocol else float("inf")
+
+    @property
+    def keepaliveInterval(self) -> float:
+        """Return how long a connection may stay quiet before being pinged."""
+        return self._keepaliveInterval
+
+    @keepaliveInterval.setter
+    def keepaliveInterval(self, value: float) -> None:
+        """Set the keepalive interval of the connections opened from now on."""
+        self._keepaliveInterval = value
+
+    async def ping(self, timeout: float = 10) -> float:
+        """Ping the system and return the round trip time, in seconds.
+
+        this is the cheapest exchange possible: it bypasses the request queue
+        raise asyncio.TimeoutError if the 'pong' does not come back in time
+        """
+        if not self._protocol:
+            raise ConnectionError("not connected")
+        return await asyncio.wait_for(self._protocol.sendPing(), timeout)
+
     def connection_made(self, protocol, transport):
         """Handle the callback from the protocol."""
         _LOGGER.debug(f"Connection established to {self._host}")
 
-    def connection_lost(self, exc):
+    def connection_lost(self, exc, protocol=None):
         """Handle the callback from the protocol."""
+        if protocol is not None and protocol is self._incoming:
+            # not our current connection: the one rotate is opening
+            # (the one it replaces is detached before being closed)
+            if self._incomingInit:
+                self._incomingInit.cancel()
+            return
         self.stop()  # should that be a cleanup instead?
         if self._diconnectedCallback:
             self._diconnectedCallback(self, exc)
 
+    async def _connect(self):
+        """Open a new connection to the system, return its transport and protocol."""
+        return await self._loop.create_connection(
+            lambda: ICProtocol(
+                self,
+                maxInFlight=self._maxInFlight,
+                keepaliveInterval=self._keepaliveInterval,
+                recorder=self._recorder,
+                msgIDs=self._msgIDs,
+            ),
+            self._host,
+            self._port,
+        )
+
+    def _currentProtocol(self) -> Optional[ICProtocol]:
+        """Return the connection the requests of the current task go to."""
+        return _via.get() or self._protocol
+
     async def start(self) -> None:
         """Connect to the Pentair system and retrieves some system information."""
-        self._transport, self._protocol = await self._loop.create_connection(
-            lambda: ICProtocol(self), self._host, self._port
-        )
+        self._transport, self._protocol = await self._connect()
+
+        if not self._sweeperTask:
+            self._sweeperTask = asyncio.create_task(self._sweeper())
+
+        await self._initialize()
 
+    async def _initialize(self) -> None:
+        """Prepare a new connection, before it is used."""
         # we start by requesting a few attributes from the SYSTEM object
         # and therefore validate that the system connected is indeed a IntelliCenter
         msg = await self.sendCmd(
@@ -159,6 +327,53 @@ class BaseController:
         info = msg["objectList"][0]
         self._systemInfo = SystemInfo(info["objnam"], info["params"])
 
+    async def rotate(self, drainTimeout: float = 5) -> None:
+        """Replace the current connection by a new one, without interruption.
+
+        the new connection is opened and fully initialized (subscribed)
+        while the current one keeps serving requests and notifications
+        then the controller switches to the new one and the old one is closed
+        once its pending requests have been answered (or after drainTimeout)
+        """
+        if not self._protocol or self._incoming:
+            raise ConnectionError("no connection to rotate")
+
+        transport, protocol = await self._connect()
+        self._incoming = protocol
+
+        # the requests issued by _initialize (and the tasks it creates)
+        # go to the new connection, all the others to the current one
+        token = _via.set(protocol)
+        try:
+            self._incomingInit = asyncio.ensure_future(self._initialize())
+        finally:
+            _via.reset(token)
+        try:
+            await asyncio.wait({self._incomingInit})
+            if self._incomingInit.cancelled():
+                raise ConnectionError("new connection lost while rotating")
+            self._incomingInit.result()
+        except BaseException:
+            self._incomingInit.cancel()
+            protocol.detach()
+            transport.close()
+            raise
+        finally:
+            self._incoming = None
+            self._incomingInit = None
+
+        # the swap itself
+        oldTransport, oldProtocol = self._transport, self._protocol
+        self._transport, self._protocol = transport, protocol
+        _LOGGER.info(f"connection to {self._host} rotated")
+
+        # let the old connection deliver the responses it still owes us
+        deadline = time.monotonic() + drainTimeout
+        while not oldProtocol.idle and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        oldProtocol.detach()
+        oldTransport.close()
+
     def stop(self):
         """Stop all activities from this controller and disconnect."""
         if self._transport:
@@ -170,34 +385,107 @@ class BaseController:
                 else:
                     request.cancel()
             self._requests.clear()
+            self._deadlines.clear()
             self._transport.close()
             self._transport = None
             self._protocol = None
-
-    def sendCmd(self, cmd, extra=None, waitForResponse=True) -> Optional[Future]:
+        if self._sweeperTask:
+            self._sweeperTask.cancel()
+            self._sweeperTask = None
+
+    async def _sweeper(self, interval=1):
+        """Regularly call _sweep."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self._sweep(time.monotonic())
+            except Exception as err:
+                # one failure must not end the expiration of the requests
+                _LOGGER.error(f"CONTROLLER: error while sweeping {err!r}")
+
+    def _sweep(self, now: float) -> None:
+        """Perform the periodic housekeeping of the connection."""
+        self._expireRequests(now)
+
+    def _expireRequests(self, now: float) -> None:
+        """Fail the requests whose deadline has passed and forget about them."""
+        expired = [
+            msg_id for msg_id, deadline in self._deadlines.items() if deadline <= now
+        ]
+        for msg_id in expired:
+            del self._deadlines[msg_id]
+            future = self._requests.pop(msg_id, None)
+            self._expired.append(msg_id)
+            self._stats["expired"] += 1
+            if future and not future.done():
+                future.set_exception(
+                    asyncio.TimeoutError(f"no response for request {msg_id}")
+                )
+        if expired:
+            _LOGGER.warning(f"CONTROLLER: {len(expired)} request(s) expired")
+
+    def sendCmd(
+        self, cmd, extra=None, waitForResponse=True, priority=None, timeout=None
+    ) -> Optional[Future]:
         """
         Send a command with optional extra parameters to the system.
 
         if waitForResponse is True, a Future is created and returned
         so either call resp = await controller.sendCmd(cmd,extra)
         or controller.sendCmd(cmd,extra,waitForResponse=False)
+
+        priority is one of the PRIORITY_ classes of the protocol
+        by default it depends on the command
+
+        timeout is the number of seconds after which the Future fails with
+        a TimeoutError (None for the controller's default, 0 for no deadline)
         """
 
-        _LOGGER.debug(f"CONTROLLER: sendCmd: {cmd} {extra} {waitForResponse}")
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("CONTROLLER: sendCmd: %s %s %s", cmd, extra, waitForResponse)
         future = Future() if waitForResponse else None
 
-        if self._protocol:
-            msg_id = self._protocol.sendCmd(cmd, extra)
-            self._requests[msg_id] = future
+        protocol = self._currentProtocol()
+        if protocol:
+            msg_id = protocol.sendCmd(cmd, extra, priority)
+            self._trackRequest(msg_id, future)
+
+            if timeout is None:
+                timeout = self._requestTimeout
+            if not future or not timeout:
+                # still make sure the entry is eventually removed
+                timeout = self._orphanTimeout
+            deadline = time.monotonic() + timeout
+            # merged requests: keep the earliest deadline
+            self._deadlines[msg_id] = min(
+                deadline, self._deadlines.get(msg_id, deadline)
+            )
         elif future:
-            future.setException(Exception("controller disconnected"))
+            future.set_exception(Exception("controller disconnected"))
 
         return future
 
+    def _trackRequest(self, msg_id: str, future: Optional[Future]) -> None:
+        """Remember who is waiting for the response to msg_id."""
+
+        if msg_id not in self._requests:
+            self._requests[msg_id] = future
+        elif future:
+            # the request has been merged into one already pending
+            # so several callers are waiting for the same response
+            previous = self._requests[msg_id]
+            if previous is None:
+                self._requests[msg_id] = future
+            else:
+                previous.add_done_callback(lambda done: _propagateResult(done, future))
+
     def requestChanges(
         self, objnam: str, changes: dict, waitForResponse=True
     ) -> Future:
-        """Submit a change for a given object."""
+        """Submit a change for a given object.
+
+        changes to objects waiting to be sent are merged in a single request
+        """
         return self.sendCmd(
             "SETPARAMLIST",
             {"objectList": [{"objnam": objnam, "params": changes}]},
@@ -246,15 +534,35 @@ class BaseController:
         """Return the current 'configuration' of the system."""
         return self.getQuery("GetConfiguration")
 
-    def receivedMessage(self, msg_id: str, command: str, response: str, msg: dict):
+    def receivedMessage(
+        self, msg_id: str, command: str, response: str, msg: dict, oldest=None
+    ):
         """Handle the callback for a incoming message.
 
         msd_id is the id of the incoming message
         response is the success (200) or error code or None (if this was a notification)
         msg is the while message as a dictionary (parsing of the JSON object)
+        oldest is the id of the request in flight on the connection the
+        response came from that it accounts for (see ICProtocol.responseReceived)
         """
 
         future = self._requests.pop(msg_id, 0)
+        self._deadlines.pop(msg_id, None)
+
+        if future == 0 and response is not None and msg_id in self._expired:
+            self._stats["late"] += 1
+            _LOGGER.debug("ignoring late response for msg_id %s", msg_id)
+            return
+
+        if future == 0 and response != "200" and response is not None:
+            # IntelliCenter does not always use the messageID of the request
+            # when replying with an error: assume it is for the oldest one
+            # actually on the wire of the connection it came from
+            if oldest is not None and oldest in self._requests:
+                self._stats["mismatched"] += 1
+                _LOGGER.debug("error %s for %s matched to %s", response, msg_id, oldest)
+                future = self._requests.pop(oldest)
+                self._deadlines.pop(oldest, None)
 
         # here future can be either:
         #  - 0 if there was no corresponding request matching this response
@@ -262,9 +570,14 @@ class BaseController:
         #  - a future is the sender of the request wanted to get the results
         #  - None is the sender declined to wait for the response (in sendCmd)
 
-        _LOGGER.debug(
-            f"CONTROLLER: receivedMessage: {msg_id} {command} {response} {future}"
-        )
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(
+                "CONTROLLER: receivedMessage: %s %s %s %s",
+                msg_id,
+                command,
+                response,
+                future,
+            )
 
         if not future == 0:
             if future:
@@ -273,7 +586,7 @@ class BaseController:
                 else:
                     future.set_exception(CommandError(response))
             else:
-                _LOGGER.debug(f"ignoring response for msg_id {msg_id}")
+                _LOGGER.debug("ignoring response for msg_id %s", msg_id)
         elif response is None or response == "200":
             self.processMessage(command, msg)
         else:
@@ -295,60 +608,460 @@ class BaseController:
 class ModelController(BaseController):
     """A controller creating and updating a PoolModel."""
 
-    def __init__(self, host, model, port=6681, loop=None):
-        """Initialize the controller."""
-        super().__init__(host, port, loop)
+    def __init__(
+        self,
+        host,
+        model,
+        port=6681,
+        loop=None,
+        maxInFlight=1,
+        recorder=None,
+        updateFilter: Optional[UpdateFilter] = None,
+    ):
+        """Initialize the controller.
+
+        updateFilter (if any) holds back the insignificant changes notified
+        """
+        super().__init__(host, port, loop, maxInFlight, recorder=recorder)
         self._model: PoolModel = model
 
         self._updatedCallback = None
+        self._updateFilter = updateFilter
+
+        # (objnam, attribute) -> number of parties tracking it, see track
+        self._tracked = Counter()
+        # True once only the tracked attributes are subscribed to
+        self._trackedOnly = False
+        # objnam -> the attributes subscribed to on the current connection
+        # None while there is no established subscription
+        self._subscribed = None
+        self._syncTask = None
+
+        # size (in estimated bytes) of the subscription batches
+        # and the smallest size known to fail, see _subscribe
+        self._batchBytes = DEFAULT_BATCH_BYTES
+        self._batchCeiling = None
+        self._subscriptionStats = {}
+
+        # (uniqueID, VER) of the snapshot the model was restored from
+        # until the next start reconciles it with the live system
+        self._restoredFrom = None
+        self._topologyChanged = False
 
     @property
     def model(self) -> PoolModel:
         """Return the model this controller manages."""
         return self._model
 
-    async def start(self):
-        """Start the controller, fetch and start monitoring the model."""
-        await super().start()
+    @property
+    def updateFilter(self) -> Optional[UpdateFilter]:
+        """Return the filter applied to the changes notified (if any)."""
+        return self._updateFilter
 
-        # now we retrieve all the objects type, subtype, sname and parent
-        allObjects = await self.getAllObjects(
-            [OBJTYP_ATTR, SUBTYP_ATTR, SNAME_ATTR, PARENT_ATTR]
-        )
-        # and process that list into our model
-        self.model.addObjects(allObjects)
+    def stop(self):
+        """Stop the controller, its subscription ends with the connection."""
+        super().stop()
+        self._subscribed = None
+
+    async def _initialize(self):
+        """Fetch and start monitoring the model on a new connection."""
+        await super()._initialize()
+        self._topologyChanged = False
+
+        if await self._inventoryUnchanged():
+            # we already know every object: the subscription alone
+            # brings back what changed while we were not connected
+            resync = True
+            _LOGGER.info(f"resynchronizing {self.model.numObjects} known objects")
+        else:
+            resync = False
+            # now we retrieve all the objects type, subtype, sname and parent
+            allObjects = await self.getAllObjects(DISCOVERY_ATTRIBUTES)
+            # and process that list into our model
+            if self._restoredFrom:
+                self._reconcile(allObjects)
+            else:
+                self._addObjects(allObjects)
 
-        # _LOGGER.debug(f"objects received: {allObjects}")
+            # _LOGGER.debug(f"objects received: {allObjects}")
 
-        _LOGGER.info(f"model now contains {self.model.numObjects} objects")
+            _LOGGER.info(f"model now contains {self.model.numObjects} objects")
 
         try:
             # now that I have my object loaded in the model
-            # build a query to monitors all their relevant attributes
-
-            attributes = self._model.attributesToTrack()
-
-            query = []
-            numAttributes = 0
-            for items in attributes:
-                query.append(items)
-                numAttributes += len(items["keys"])
-                # a query too large can choke the protocol...
-                # we split them in maximum of 50 attributes (arbitrary but seems to work)
-                if numAttributes >= 50:
-                    res = await self.sendCmd("RequestParamList", {"objectList": query})
-                    self._applyUpdates(res["objectList"])
-                    query = []
-                    numAttributes = 0
-            # and issue the remaining elements if any
-            if query:
-                res = await self.sendCmd("RequestParamList", {"objectList": query})
-                self._applyUpdates(res["objectList"])
+            # subscribe to all their relevant attributes
+            self._subscribed = None
+            wanted = self._wantedAttributes()
+            await self._subscribe(
+                [
+                    {"objnam": objnam, "keys": list(keys)}
+                    for objnam, keys in wanted.items()
+                ]
+            )
+            self._subscribed = wanted
+            # in case the tracking changed in the meantime
+            self._scheduleSync()
 
         except Exception as err:
             traceback.print_exc()
             raise err
 
+        self._subscriptionStats["resync"] = resync
+        # from now on the model reflects the live system
+        self._restoredFrom = None
+
+    async def _inventoryUnchanged(self) -> bool:
+        """Return True if the system still has the objects of the model.
+
+        this only asks for the type of each object, without the names
+        a rename (or any other change) of an attribute tracked comes back
+        with the subscription
+        """
+        if not self._model.numObjects:
+            return False
+        if self._restoredFrom and self._restoredFrom != (
+            self._systemInfo.uniqueID,
+            self._systemInfo.swVersion,
+        ):
+            # another system or another firmware: start from scratch
+            return False
+        inventory = await self.getAllObjects(INVENTORY_ATTRIBUTES)
+        return self._model.matchesInventory(inventory)
+
+    def _addObjects(self, allObjects: list) -> None:
+        """Add the new objects to the model, update the known ones."""
+        known = [item for item in allObjects if item["objnam"] in self._model.objects]
+        if known:
+            # renamed or moved while we were not connected: notified
+            self._applyUpdates(known, filtered=False)
+        self._model.addObjects(allObjects)
+
+    @property
+    def restored(self) -> bool:
+        """Return True if the model comes from a snapshot not reconciled yet."""
+        return self._restoredFrom is not None
+
+    @property
+    def topologyChanged(self) -> bool:
+        """Return True if the last start found objects differing from the snapshot.
+
+        (objects added or removed, another system or another firmware)
+        """
+        return self._topologyChanged
+
+    def snapshot(self) -> Optional[dict]:
+        """Return the model, system information and subscription plan.
+
+        the result can be serialized as JSON and given to restore
+        """
+        if not self._systemInfo:
+            return None
+        return {
+            "version": SNAPSHOT_VERSION,
+            "uniqueID": self._systemInfo.uniqueID,
+            "swVersion": self._systemInfo.swVersion,
+            "system": self._systemInfo.asDict(),
+            "objects": self._model.snapshot(),
+            "subscription": {
+                "batchBytes": self._batchBytes,
+                "batchCeiling": self._batchCeiling,
+            },
+        }
+
+    def restore(self, snapshot: dict, uniqueID: str = None) -> bool:
+        """Populate an empty model from a snapshot, before the controller is started.
+
+        if uniqueID is given, the snapshot must have been taken for that system
+        the model is reconciled with the live system by the next start
+        return True if the snapshot has been used
+        """
+        if (
+            not snapshot
+            or snapshot.get("version") != SNAPSHOT_VERSION
+            or (uniqueID and snapshot.get("uniqueID") != uniqueID)
+            or self._model.numObjects
+        ):
+            return False
+
+        system = snapshot["system"]
+        self._systemInfo = SystemInfo(system["objnam"], system["params"])
+        # the model takes ownership of the params, give it a copy
+        self._model.addObjects(
+            [
+                {"objnam": obj["objnam"], "params": dict(obj["params"])}
+                for obj in snapshot["objects"]
+            ]
+        )
+        subscription = snapshot.get("subscription", {})
+        self._batchBytes = subscription.get("batchBytes", self._batchBytes)
+        self._batchCeiling = subscription.get("batchCeiling", self._batchCeiling)
+
+        self._restoredFrom = (snapshot["uniqueID"], snapshot["swVersion"])
+        _LOGGER.info(f"model restored with {self._model.numObjects} objects")
+        return True
+
+    def _reconcile(self, allObjects: list) -> None:
+        """Bring a model restored from a snapshot in line with the live system."""
+        restored = set(self._model.objects)
+        live = {obj["objnam"] for obj in allObjects}
+
+        for objnam in restored - live:
+            self._model.removeObject(objnam)
+        self._addObjects(allObjects)
+        added = set(self._model.objects) - restored
+
+        self._topologyChanged = bool(added or restored - live) or (
+            self._restoredFrom
+            != (self._systemInfo.uniqueID, self._systemInfo.swVersion)
+        )
+        if self._topologyChanged:
+            _LOGGER.info(
+                f"system differs from the snapshot: {len(added)} object(s) added,"
+                f" {len(restored - live)} removed,"
+                f" firmware {self._restoredFrom[1]} -> {self._systemInfo.swVersion}"
+            )
+
+    @staticmethod
+    def _estimateBytes(item: dict) -> int:
+        """Estimate the size of the request and response for one object."""
+        keys = item["keys"]
+        # each key appears quoted in both, the response adds a value
+        return 2 * len(item["objnam"]) + 40 + sum(2 * len(key) + 16 for key in keys)
+
+    def _nextBatch(self, items: deque) -> list:
+        """Take from items a batch fitting in the current batch size."""
+        batch = [items.popleft()]
+        size = self._estimateBytes(batch[0])
+        while items and size + self._estimateBytes(items[0]) <= self._batchBytes:
+            size += self._estimateBytes(items[0])
+            batch.append(items.popleft())
+        return batch
+
+    def _batchSucceeded(self, size: int) -> None:
+        """Grow the batch size, staying below the size known to fail."""
+        if size * 2 < self._batchBytes:
+            # that batch did not tell us anything about a bigger one
+            return
+        limit = MAX_BATCH_BYTES
+        if self._batchCeiling:
+            limit = min(limit, self._batchCeiling - 1)
+        self._batchBytes = max(self._batchBytes, min(self._batchBytes * 2, limit))
+
+    def _batchFailed(self, size: int) -> None:
+        """Remember that a batch of that size failed and shrink the batch size."""
+        self._batchCeiling = min(size, self._batchCeiling or size)
+        self._batchBytes = max(MIN_BATCH_BYTES, min(self._batchBytes, size // 2))
+
+    async def _requestBatch(self, batch: list):
+        """Subscribe to the attributes of a batch, return the response and duration."""
+        start = time.monotonic()
+        res = await self.sendCmd("RequestParamList", {"objectList": batch})
+        return res, time.monotonic() - start
+
+    async def _subscribe(self, items: list) -> None:
+        """Request (and subscribe to) the attributes of the model's objects.
+
+        A query too large can choke the protocol so the objects are grouped
+        in batches whose size is estimated in bytes. The size grows while
+        the batches succeed and is halved (and the failed batch retried in
+        smaller ones) when one fails. What was learned is kept for the next
+        start. As many batches as the protocol's window allows are in flight.
+        """
+        items = deque(items)
+        running = {}
+        timings = []
+        retries = 0
+        start = time.monotonic()
+
+        while items or running:
+            protocol = self._currentProtocol()
+            window = protocol.window if protocol else 1
+            while items and len(running) < window:
+                batch = self._nextBatch(items)
+                size = sum(self._estimateBytes(item) for item in batch)
+                task = asyncio.ensure_future(self._requestBatch(batch))
+                running[task] = (batch, size)
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                batch, size = running.pop(task)
+                err = task.exception()
+                if err:
+                    if len(batch) == 1 or not self._currentProtocol():
+                        for other in running:
+                            other.cancel()
+                        raise err
+                    _LOGGER.warning(
+                        f"CONTROLLER: batch of {size} bytes failed ({err!r}), retrying"
+                    )
+                    retries += 1
+                    self._batchFailed(size)
+                    items.extendleft(reversed(batch))
+                    continue
+
+                res, elapsed = task.result()
+                # the subscription establishes the values: not filtered
+                self._applyUpdates(res["objectList"], filtered=False)
+                self._batchSucceeded(size)
+                timings.append(
+                    {
+                        "objects": len(batch),
+                        "attributes": sum(len(item["keys"]) for item in batch),
+                        "bytes": size,
+                        "seconds": round(elapsed, 4),
+                    }
+                )
+                if _LOGGER.isEnabledFor(logging.DEBUG):
+                    _LOGGER.debug("CONTROLLER: batch %s", timings[-1])
+
+        self._subscriptionStats = {
+            "duration": round(time.monotonic() - start, 4),
+            "retries": retries,
+            "batchBytes": self._batchBytes,
+            "batchCeiling": self._batchCeiling,
+            "batches": timings,
+        }
+        _LOGGER.info(
+            f"subscribed to {sum(t['attributes'] for t in timings)} attributes"
+            f" in {len(timings)} batches"
+            f" in {self._subscriptionStats['duration']:.2f}s"
+        )
+
+    @property
+    def subscriptionStats(self) -> dict:
+        """Return how the last subscription phase went, batch per batch."""
+        return self._subscriptionStats
+
+    @property
+    def numSubscribed(self) -> int:
+        """Return the number of attributes subscribed to on the connection."""
+        return sum(len(keys) for keys in (self._subscribed or {}).values())
+
+    # ---------------------------------------------------------------------------
+
+    def _trackingKeys(self, dependencies: dict) -> list:
+        """Return the (objnam, attribute) pairs the model tracks in dependencies."""
+        keys = []
+        for objnam, attributes in dependencies.items():
+            object = self._model[objnam]
+            if object is None:
+                continue
+            tracked = self._model.attributesOf(object.objtype)
+            if ANY_ATTRIBUTE in attributes:
+                attributes = tracked
+            keys.extend((objnam, key) for key in attributes if key in tracked)
+        return keys
+
+    def track(self, dependencies: dict) -> None:
+        """Record that a party depends on attributes of the model.
+
+        dependencies maps objnams to attributes (ANY_ATTRIBUTE for all the
+        ones the model tracks for the object), each call must eventually
+        be matched by an untrack with the same dependencies
+        once trackOnly has been called, the attributes tracked by nobody
+        are no longer subscribed to
+        """
+        for key in self._trackingKeys(dependencies):
+            self._tracked[key] += 1
+        self._scheduleSync()
+
+    def untrack(self, dependencies: dict) -> None:
+        """Record that a party no longer depends on attributes of the model."""
+        for key in self._trackingKeys(dependencies):
+            count = self._tracked[key] - 1
+            if count > 0:
+                self._tracked[key] = count
+            else:
+                del self._tracked[key]
+        self._scheduleSync()
+
+    def trackOnly(self) -> None:
+        """Only subscribe to the attributes tracked from now on.
+
+        until then every attribute of the model is subscribed to, which
+        provides the values the parties use to decide what they track
+        """
+        self._trackedOnly = True
+        self._scheduleSync()
+
+    def _wantedAttributes(self) -> dict:
+        """Return the attributes, by objnam, to subscribe to."""
+        if not self._trackedOnly:
+            return {
+                item["objnam"]: set(item["keys"])
+                for item in self._model.attributesToTrack()
+            }
+        wanted = {}
+        for objnam, key in self._tracked:
+            object = self._model[objnam]
+            if object is not None:
+                keys = wanted.setdefault(objnam, set())
+                keys.add(key)
+                # names are cached by the parties tracking the object
+                if SNAME_ATTR in self._model.attributesOf(object.objtype):
+                    keys.add(SNAME_ATTR)
+        # the unit system, name and version of the SystemInfo
+        systemKeys = SYSTEM_INFO_ATTRIBUTES.intersection(
+            self._model.attributesOf(SYSTEM_TYPE)
+        )
+        if systemKeys:
+            for object in self._model.getByType(SYSTEM_TYPE):
+                wanted.setdefault(object.objnam, set()).update(systemKeys)
+        return wanted
+
+    def _scheduleSync(self) -> None:
+        """Bring the subscription in line with the tracking, soon."""
+        if self._subscribed is not None and self._syncTask is None:
+            self._syncTask = asyncio.ensure_future(self._syncSubscription())
+
+    async def _syncSubscription(self) -> None:
+        """Request the attributes wanted not subscribed to, release the others."""
+        try:
+            # gather the tracking changes made at the same time
+            await asyncio.sleep(0)
+            while self._subscribed is not None:
+                subscribed = self._subscribed
+                wanted = self._wantedAttributes()
+                extra = _difference(subscribed, wanted)
+                missing = _difference(wanted, subscribed)
+                if not extra and not missing:
+                    break
+                if extra:
+                    await self._sendByBatch("ReleaseParamList", extra)
+                    if self._subscribed is subscribed:
+                        for objnam, keys in extra.items():
+                            subscribed[objnam] -= keys
+                            if not subscribed[objnam]:
+                                del subscribed[objnam]
+                if missing:
+                    objectList = await self._sendByBatch("RequestParamList", missing)
+                    if self._subscribed is subscribed:
+                        for objnam, keys in missing.items():
+                            subscribed.setdefault(objnam, set()).update(keys)
+                        self._applyUpdates(objectList, filtered=False)
+                _LOGGER.info(
+                    f"subscription updated: {self.numSubscribed} attributes"
+                    f" (-{sum(map(len, extra.values()))}"
+                    f" +{sum(map(len, missing.values()))})"
+                )
+        except Exception as err:
+            # the next connection subscribes to what is wanted anyway
+            _LOGGER.warning(f"CONTROLLER: failed to update the subscription {err!r}")
+        finally:
+            self._syncTask = None
+
+    async def _sendByBatch(self, command: str, attributes: dict) -> list:
+        """Send a command for attributes by objnam, return the objects received."""
+        items = deque(
+            {"objnam": objnam, "keys": sorted(keys)}
+            for objnam, keys in attributes.items()
+        )
+        objectList = []
+        while items:
+            res = await self.sendCmd(command, {"objectList": self._nextBatch(items)})
+            objectList.extend(res.get("objectList", []))
+        return objectList
+
     def receivedQueryResult(self, queryName: str, answer):
         """Handle the result of all 'getQuery' responses."""
 
@@ -358,16 +1071,37 @@ class ModelController(BaseController):
 
         pass
 
-    def _applyUpdates(self, changesAsList):
-        """Apply updates received to the model."""
+    def _sweep(self, now: float) -> None:
+        """Also apply the changes the filter no longer holds back."""
+        super()._sweep(now)
+        if self._updateFilter:
+            due = self._updateFilter.due(self._model, now)
+            if due:
+                self._publishUpdates(due)
+
+    def _applyUpdates(self, changesAsList, filtered=True):
+        """Apply updates received to the model.
+
+        unless filtered is False, the changes go through the updateFilter
+        """
+        if self._updateFilter:
+            if filtered:
+                changesAsList = self._updateFilter.filter(
+                    self._model, changesAsList, time.monotonic()
+                )
+            else:
+                self._updateFilter.forget(changesAsList)
+        return self._publishUpdates(changesAsList)
+
+    def _publishUpdates(self, changesAsList):
+        """Apply changes to the model and notify the update callback."""
 
         updates = self._model.processUpdates(changesAsList)
 
         # if an update happens on the SYSTEM object
         # also applies it to our cached SystemInfo
-        systemObjnam = self._systemInfo._objnam
-        if systemObjnam in updates:
-            self._systemInfo.update(updates[systemObjnam])
+        if self._systemInfo and self._systemInfo._objnam in updates:
+            self._systemInfo.update(updates[self._systemInfo._objnam])
 
         if updates and self._updatedCallback:
             self._updatedCallback(self, updates)
@@ -397,7 +1131,7 @@ class ModelController(BaseController):
         """Handle the response for a request for objects."""
 
         _LOGGER.debug(
-            f"CONTROLLER: received SystemConfig for {len(objectList)} object(s)"
+            "CONTROLLER: received SystemConfig for %d object(s)", len(objectList)
         )
 
         # note that here we might create new objects
@@ -406,7 +1140,8 @@ class ModelController(BaseController):
     def processMessage(self, command: str, msg):
         """Handle the callback for an incoming message."""
 
-        _LOGGER.debug(f"CONTROLLER: received {command} response: {msg}")
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("CONTROLLER: received %s response: %s", command, msg)
 
         try:
             if command == "SendQuery":
@@ -414,11 +1149,14 @@ class ModelController(BaseController):
             elif command == "NotifyList":
                 self.receivedNotifyList(msg["objectList"])
             elif command == "WriteParamList":
-                self.receivedWriteParamList(msg["objectList"][0]["changes"])
+                # a merged request can change several objects
+                self.receivedWriteParamList(
+                    [change for item in msg["objectList"] for change in item["changes"]]
+                )
             elif command == "SendParamList":
                 self.receivedSystemConfig(msg["objectList"])
             else:
-                _LOGGER.debug(f"no handler for {command}")
+                _LOGGER.debug("no handler for %s", command)
         except Exception as err:
             _LOGGER.error(f"error {err} while processing {msg}")
             # traceback.print_exc()
@@ -431,9 +1169,26 @@ class ConnectionHandler:
     """Helper class to recover the connect/disconnect/reconnect cycle of a controller."""
 
     def __init__(
-        self, controller, timeBetweenReconnects=30, force_reconnect_interval=3600
+        self,
+        controller,
+        timeBetweenReconnects=30,
+        force_reconnect_interval=3600,
+        rotateConnection=True,
+        heartbeatIdle=10,
+        pongTimeout=5,
+        maxMissedPings=2,
     ):
-        """Initialize the handler."""
+        """Initialize the handler.
+
+        if rotateConnection is True, the periodic forced reconnection
+        opens the new connection before closing the old one (see
+        BaseController.rotate) instead of disconnecting
+        the system is only pinged once nothing was received from it for
+        heartbeatIdle seconds: the regular traffic proves it is alive
+        each ping is given pongTimeout seconds to be answered, the
+        connection is replaced after maxMissedPings consecutive failures
+        (this replaces the keepalive of the connections)
+        """
         _LOGGER.info(
             "Initializing ConnectionHandler with improved connection management (CUSTOM VERSION 0.4)"
         )
@@ -445,9 +1200,15 @@ class ConnectionHandler:
         self._last_successful_connection = None
         self._timeBetweenReconnects = timeBetweenReconnects
         self._force_reconnect_interval = force_reconnect_interval
+        self._rotateConnection = rotateConnection
+        self._heartbeatIdle = heartbeatIdle
+        self._pongTimeout = pongTimeout
+        self._maxMissedPings = maxMissedPings
         self._is_connected = False
         self._consecutive_failures = 0
 
+        # the heartbeat pings the system itself, see _heartbeat
+        controller.keepaliveInterval = 0
         controller._diconnectedCallback = self._diconnectedCallback
 
         if hasattr(controller, "_updatedCallback"):
@@ -468,32 +1229,13 @@ class ConnectionHandler:
         """Periodically check connection health and force reconnect if needed."""
         while not self._stopped:
             try:
-                await asyncio.sleep(60)  # Check every minute
+                silence = self._controller.silence if self._is_connected else 0
+                await asyncio.sleep(max(0, self._heartbeatIdle - silence))
 
                 if self._is_connected:
-                    # Try sending a lightweight command to verify connection
-                    try:
-                        await self._controller.sendCmd(
-                            "GetParamList",
-                            {
-                                "condition": f"{OBJTYP_ATTR}={SYSTEM_TYPE}",
-                                "objectList": [
-                                    {
-                                        "objnam": "INCR",
-                                        "keys": [MODE_ATTR],
-                                    }
-                                ],
-                            },
-                            waitForResponse=True,
-                        )
-                        # Reset failure count on successful heartbeat
-                        self._consecutive_failures = 0
-                    except Exception as err:
-                        _LOGGER.warning(f"Heartbeat check failed: {err}")
-                        self._consecutive_failures += 1
-                        if self._consecutive_failures >= 3:  # After 3 failed heartbeats
-                            self._controller.stop()
-                        continue
+                    if self._controller.silence >= self._heartbeatIdle:
+                        if not await self._heartbeat():
+                            continue
 
                     # Force reconnect if we've been connected too long
                     if (
@@ -502,7 +1244,7 @@ class ConnectionHandler:
                         > self._force_reconnect_interval
                     ):
                         _LOGGER.info("Forcing reconnection due to age of connection")
-                        self._controller.stop()
+                        await self._forceReconnect()
                         continue
 
                 # Check controller health
@@ -515,6 +1257,38 @@ class ConnectionHandler:
             except Exception as err:
                 _LOGGER.error(f"Error in health check: {err}")
 
+    async def _heartbeat(self) -> bool:
+        """Ping the quiet system, return False if it did not answer.
+
+        the outcome feeds the failure counter and the connection is stopped
+        (which triggers a reconnection) after maxMissedPings failures
+        """
+        try:
+            rtt = await self._controller.ping(self._pongTimeout)
+        except Exception as err:
+            self._consecutive_failures += 1
+            _LOGGER.warning(
+                f"Heartbeat check failed ({self._consecutive_failures}): {err!r}"
+            )
+            if self._consecutive_failures >= self._maxMissedPings:
+                self._controller.stop()
+            return False
+        _LOGGER.debug(f"heartbeat answered in {rtt * 1000:.1f}ms")
+        self._consecutive_failures = 0
+        return True
+
+    async def _forceReconnect(self):
+        """Replace the connection, if possible without disconnecting."""
+        if self._rotateConnection:
+            try:
+                await self._controller.rotate()
+                self._last_successful_connection = time.time()
+                self.rotated(self._controller)
+                return
+            except Exception as err:
+                _LOGGER.warning(f"cannot rotate connection, reconnecting: {err!r}")
+        self._controller.stop()
+
     def _check_controller_health(self):
         """Check if controller appears to be functioning properly."""
         try:
@@ -542,7 +1316,15 @@ class ConnectionHandler:
                     await asyncio.sleep(initialDelay)
                 _LOGGER.debug("trying to start controller")
 
-                await self._controller.start()
+                try:
+                    await self._controller.start()
+                except asyncio.CancelledError:
+                    task = asyncio.current_task()
+                    if self._stopped or (task and task.cancelling()):
+                        raise
+                    # the connection was lost while starting, which cancels
+                    # the requests in flight: retry like any other failure
+                    raise ConnectionError("connection lost while starting") from None
                 self._last_successful_connection = time.time()
                 self._is_connected = True
                 self._consecutive_failures = 0  # Reset failure count on success
@@ -569,6 +1351,8 @@ class ConnectionHandler:
                 self._is_connected = False
                 self._consecutive_failures += 1
                 _LOGGER.error(f"Cannot start: {err}")
+                # do not leave a half started connection behind
+                self._controller.stop()
                 self.retrying(delay)
                 await asyncio.sleep(delay)
                 delay = self._next_delay(delay)
@@ -588,8 +1372,11 @@ class ConnectionHandler:
 
     def _diconnectedCallback(self, controller, err):
         """Handle the disconnection of the underlying controller."""
+        # no heartbeat until the starter reconnects
+        self._is_connected = False
         self.disconnected(controller, err)
-        if not self._stopped:
+        # no need for another starter if one is already retrying
+        if not self._stopped and not self._starterTask:
             _LOGGER.error(
                 f"system disconnected from {self._controller.host} {err if err else ''}"
             )
@@ -616,3 +1403,7 @@ class ConnectionHandler:
     def reconnected(self, controller):
         """Handle the controller being reconnected."""
         pass
+
+    def rotated(self, controller):
+        """Handle the connection of the controller being replaced without interruption."""
+        pass
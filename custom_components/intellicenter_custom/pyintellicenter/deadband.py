@@ -0,0 +1,209 @@
+"""Filtering of the insignificant changes of noisy attributes.
+
+Pumps (PWR, RPM, GPM), chemistry controllers (PHVAL, ORPVAL) and sensors
+(SOURCE) report every small fluctuation. An UpdateFilter given to the
+ModelController drops the changes of such attributes which are:
+
+- within a deadband around the value last let through, either absolute
+  (PWR moving by less than 25) or relative (ORPVAL by less than 2%)
+- too close to the last change let through (minInterval)
+
+until they have been held back for maxStaleness seconds: the latest value
+is then let through anyway, as is a change held back by minInterval once
+the interval has elapsed (see UpdateFilter.due).
+
+The model (and the entities) therefore hold the last value let through.
+"""
+
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+
+
+class FilterRule:
+    """The thresholds applied to the changes of an attribute."""
+
+    def __init__(
+        self,
+        absolute: float = 0,
+        relative: float = 0,
+        minInterval: float = 0,
+        maxStaleness: float = 0,
+    ):
+        """Initialize a rule.
+
+        absolute and relative (a fraction of the value) define the deadband
+        minInterval and maxStaleness are in seconds, 0 disables them
+        """
+        self.absolute = absolute
+        self.relative = relative
+        self.minInterval = minInterval
+        self.maxStaleness = maxStaleness
+
+    def isSignificant(self, previous, value) -> bool:
+        """Return True if the change from previous to value is beyond the deadband."""
+        try:
+            previous = float(previous)
+            value = float(value)
+        except (TypeError, ValueError):
+            # not numbers (or no previous value): any change matters
+            return True
+        delta = abs(value - previous)
+        if self.absolute and delta < self.absolute:
+            return False
+        if self.relative and delta < abs(previous) * self.relative:
+            return False
+        return True
+
+    def __repr__(self) -> str:
+        """Return a representation of the rule."""
+        return (
+            f"FilterRule(absolute={self.absolute}, relative={self.relative},"
+            f" minInterval={self.minInterval}, maxStaleness={self.maxStaleness})"
+        )
+
+
+def parseRules(spec: str, minInterval: float = 0, maxStaleness: float = 0) -> dict:
+    """Return the rules described by a string like 'PWR=25 PUMP/RPM=10 ORPVAL=2%'.
+
+    each entry is [OBJTYP/]ATTRIBUTE=THRESHOLD, a threshold ending with %
+    is relative to the value, entries are separated by spaces or commas
+    minInterval and maxStaleness apply to all the rules
+    raise ValueError if the string is malformed
+    """
+    rules = {}
+    for entry in spec.replace(",", " ").split():
+        key, sep, threshold = entry.partition("=")
+        objtype, _, attribute = key.rpartition("/")
+        if not sep or not attribute:
+            raise ValueError(f"invalid rule '{entry}'")
+        try:
+            if threshold.endswith("%"):
+                rule = FilterRule(relative=float(threshold[:-1]) / 100)
+            else:
+                rule = FilterRule(absolute=float(threshold))
+        except ValueError:
+            raise ValueError(f"invalid threshold in '{entry}'") from None
+        rule.minInterval = minInterval
+        rule.maxStaleness = maxStaleness
+        rules[(objtype.upper() or None, attribute.upper())] = rule
+    return rules
+
+
+# ---------------------------------------------------------------------------
+
+
+class UpdateFilter:
+    """Hold back the insignificant changes of the attributes given a rule."""
+
+    def __init__(self, rules: dict):
+        """Initialize the filter.
+
+        rules maps (objtype, attribute) to a FilterRule
+        an objtype of None applies the rule to all types of objects
+        """
+        self._rules = rules
+        self._attributes = frozenset(attribute for (_, attribute) in rules)
+        # (objnam, attribute) -> when a change was last let through
+        self._published = {}
+        # (objnam, attribute) -> [latest value held back, since when, rule]
+        self._pending = {}
+        self._stats = {"passed": 0, "suppressed": 0, "flushed": 0}
+
+    @property
+    def rules(self) -> dict:
+        """Return the rules of the filter."""
+        return self._rules
+
+    @property
+    def stats(self) -> dict:
+        """Return the number of changes let through, held back and released."""
+        return {**self._stats, "pending": len(self._pending)}
+
+    def _rule(self, objtype: str, attribute: str):
+        return self._rules.get((objtype, attribute)) or self._rules.get(
+            (None, attribute)
+        )
+
+    def filter(self, model, changesAsList: list, now: float) -> list:
+        """Return the changes (in the format of a NotifyList) to apply to the model."""
+        result = []
+        for item in changesAsList:
+            params = item["params"]
+            if self._attributes.isdisjoint(params):
+                result.append(item)
+                continue
+            object = model[item["objnam"]]
+            if object is None:
+                result.append(item)
+                continue
+            kept = {}
+            for key, value in params.items():
+                rule = (
+                    self._rule(object.objtype, key) if key in self._attributes else None
+                )
+                if rule is None or self._letThrough(object, key, value, rule, now):
+                    kept[key] = value
+            if kept:
+                result.append({"objnam": item["objnam"], "params": kept})
+        return result
+
+    def _letThrough(self, object, key: str, value, rule: FilterRule, now) -> bool:
+        """Decide if a change of a filtered attribute is applied now."""
+        pendingKey = (object.objnam, key)
+        current = object[key]
+        if value == current:
+            # back to the value last let through
+            self._pending.pop(pendingKey, None)
+            return True
+        published = self._published.get(pendingKey)
+        if rule.isSignificant(current, value) and (
+            published is None or now - published >= rule.minInterval
+        ):
+            self._pending.pop(pendingKey, None)
+            self._published[pendingKey] = now
+            self._stats["passed"] += 1
+            return True
+        pending = self._pending.get(pendingKey)
+        if pending:
+            pending[0] = value
+        else:
+            self._pending[pendingKey] = [value, now, rule]
+        self._stats["suppressed"] += 1
+        return False
+
+    def forget(self, changesAsList: list) -> None:
+        """Drop what is held back for changes applied without the filter."""
+        if not self._pending:
+            return
+        for item in changesAsList:
+            for key in item["params"]:
+                self._pending.pop((item["objnam"], key), None)
+
+    def due(self, model, now: float) -> list:
+        """Return the changes held back which must be applied by now.
+
+        the ones held back by minInterval once it has elapsed and the ones
+        held back longer than maxStaleness
+        """
+        changes = {}
+        for pendingKey, (value, since, rule) in list(self._pending.items()):
+            objnam, key = pendingKey
+            object = model[objnam]
+            if object is None:
+                del self._pending[pendingKey]
+                continue
+            published = self._published.get(pendingKey)
+            intervalElapsed = published is None or now - published >= rule.minInterval
+            if (intervalElapsed and rule.isSignificant(object[key], value)) or (
+                rule.maxStaleness and now - since >= rule.maxStaleness
+            ):
+                del self._pending[pendingKey]
+                self._published[pendingKey] = now
+                self._stats["flushed"] += 1
+                changes.setdefault(objnam, {})[key] = value
+        return [
+            {"objnam": objnam, "params": params} for objnam, params in changes.items()
+        ]
@@ -1,33 +1,105 @@
 """Model class for storing a Pentair system."""
 
+from collections import Counter
 import logging
+from sys import intern
 from typing import List
 
 from .attributes import (
     ALL_ATTRIBUTES_BY_TYPE,
+    ATTRIBUTE_TYPES,
+    ATTRIBUTE_TYPES_BY_TYPE,
+    BOOL_VALUE,
     CIRCUIT_TYPE,
     FEATR_ATTR,
+    FLOAT_VALUE,
+    INT_VALUE,
+    NULL_OBJNAM,
+    OBJNAMS_VALUE,
     OBJTYP_ATTR,
     PARENT_ATTR,
+    REFERENCE_ATTRIBUTES,
     SNAME_ATTR,
     STATUS_ATTR,
     SUBTYP_ATTR,
+    TIME_VALUE,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
+# the attributes the indexes of PoolModel are built on
+INDEXED_ATTRIBUTES = (
+    frozenset([OBJTYP_ATTR, SUBTYP_ATTR, PARENT_ATTR]) | REFERENCE_ATTRIBUTES
+)
+
+# values up to that length are interned: ON/OFF, objnams, small numbers...
+# longer ones (names, versions...) are seldom shared between objects
+INTERN_MAX_LENGTH = 8
+
+
+def _intern(value):
+    """Return the interned version of a short string, anything else unchanged."""
+    if type(value) is str and len(value) <= INTERN_MAX_LENGTH:
+        return intern(value)
+    return value
+
+
+def _parseBool(value: str) -> bool:
+    if value not in ("ON", "OFF"):
+        raise ValueError(value)
+    return value == "ON"
+
+
+def _parseObjnams(value: str) -> tuple:
+    return tuple(objnam for objnam in value.split() if objnam != NULL_OBJNAM)
+
+
+def _parseTime(value: str) -> tuple:
+    hours, minutes, seconds = value.split(",")
+    return (int(hours), int(minutes), int(seconds))
+
+
+# how to convert the values of each type of ATTRIBUTE_TYPES
+PARSERS = {
+    INT_VALUE: int,
+    FLOAT_VALUE: float,
+    BOOL_VALUE: _parseBool,
+    OBJNAMS_VALUE: _parseObjnams,
+    TIME_VALUE: _parseTime,
+}
+
 # ---------------------------------------------------------------------------
 
 
 class PoolObject:
     """Representation of an object in the Pentair system."""
 
-    def __init__(self, objnam, params):
-        """Initialize."""
-        self._objnam = objnam
-        self._objtyp = params.pop(OBJTYP_ATTR)
-        self._subtyp = params.pop(SUBTYP_ATTR, None)
-        self._properties = params
+    # a system has hundreds of objects, each holding a lot of the same
+    # short strings (attribute names, ON/OFF, 00000...): keep them compact
+    __slots__ = (
+        "_objnam",
+        "_objtyp",
+        "_subtyp",
+        "_properties",
+        "_values",
+        "_parseErrors",
+    )
+
+    def __init__(self, objnam, params, parseErrors: Counter = None):
+        """Initialize.
+
+        parseErrors (if any) counts, by attribute, the values getValue
+        could not convert (see PoolModel.parseErrors)
+        """
+        self._objnam = intern(objnam)
+        self._objtyp = intern(params.pop(OBJTYP_ATTR))
+        self._subtyp = _intern(params.pop(SUBTYP_ATTR, None))
+        self._properties = {
+            intern(key): _intern(value) for (key, value) in params.items()
+        }
+        # attribute -> value converted by getValue, created on first use
+        self._values = None
+        self._parseErrors = parseErrors
 
     @property
     def objnam(self):
@@ -110,6 +182,46 @@ class PoolObject:
             result += f" {key}: {value}"
         return result
 
+    def getValue(self, key):
+        """Return the value for attribute 'key' converted to its type.
+
+        see ATTRIBUTE_TYPES, the value of other attributes is returned as is
+        None if the attribute is not set or its value cannot be converted
+        the converted value is kept until update changes the attribute
+        """
+        values = self._values
+        if values is not None and key in values:
+            return values[key]
+        value = self._properties.get(key)
+        byType = ATTRIBUTE_TYPES_BY_TYPE.get(self._objtyp)
+        valueType = (byType and byType.get(key)) or ATTRIBUTE_TYPES.get(key)
+        if valueType is None or value is None:
+            return value
+        if value == "":
+            value = None
+        else:
+            try:
+                value = PARSERS[valueType](value)
+            except (TypeError, ValueError):
+                # a data quality issue rather than a reason to fail
+                if self._parseErrors is not None:
+                    self._parseErrors[key] += 1
+                _LOGGER.warning(
+                    "%s: %s '%s' is not a %s", self._objnam, key, value, valueType
+                )
+                value = None
+        if values is None:
+            values = self._values = {}
+        values[key] = value
+        return value
+
+    def references(self, attribute: str) -> List[str]:
+        """Return the objnams an attribute refers to (see REFERENCE_ATTRIBUTES)."""
+        value = self._properties.get(attribute)
+        if not isinstance(value, str):
+            return []
+        return [objnam for objnam in value.split() if objnam != NULL_OBJNAM]
+
     @property
     def attributes(self) -> list:
         """Return the list of attributes for this object."""
@@ -120,6 +232,14 @@ class PoolObject:
         """Return the properties of the object."""
         return self._properties
 
+    def asDict(self) -> dict:
+        """Return the object in the format PoolModel.addObject takes."""
+        params = {OBJTYP_ATTR: self._objtyp}
+        if self._subtyp:
+            params[SUBTYP_ATTR] = self._subtyp
+        params.update(self._properties)
+        return {"objnam": self._objnam, "params": params}
+
     def update(self, updates):
         """Update the object from a set of key/value pairs, return the changed attributes."""
 
@@ -134,11 +254,19 @@ class PoolObject:
 
             # there are a few case when we receive the type/subtype in an update
             if key == OBJTYP_ATTR:
-                self._objtyp = value
+                if value == self._objtyp:
+                    continue
+                self._objtyp = intern(value)
+                # the types of some attributes depend on it
+                self._values = None
             elif key == SUBTYP_ATTR:
-                self._subtyp = value
+                if value == self._subtyp:
+                    continue
+                self._subtyp = _intern(value)
             else:
-                self._properties[key] = value
+                self._properties[intern(key)] = _intern(value)
+                if self._values:
+                    self._values.pop(key, None)
             changed[key] = value
 
         return changed
@@ -155,6 +283,15 @@ class PoolModel:
         self._objects: dict[str, PoolObject] = {}
         self._systemObject: PoolObject = None
         self._attributeMap = attributeMap
+        # objtype -> subtype -> objnam -> object
+        # the objects of a type, whatever their subtype, are under None
+        self._byType: dict[str, dict[str, dict[str, PoolObject]]] = {}
+        # parent objnam -> objnam -> object
+        self._children: dict[str, dict[str, PoolObject]] = {}
+        # objnam -> attribute -> objnam -> object referring to it
+        self._referrers: dict[str, dict[str, dict[str, PoolObject]]] = {}
+        # the number of values, by attribute, which could not be converted
+        self._parseErrors = Counter()
 
     @property
     def objectList(self):
@@ -166,6 +303,11 @@ class PoolModel:
         """Return the dictionary of objects contained in the model."""
         return self._objects
 
+    @property
+    def parseErrors(self) -> Counter:
+        """Return the number of values, by attribute, getValue could not convert."""
+        return self._parseErrors
+
     @property
     def numObjects(self) -> int:
         """Return the number of objects contained in the model."""
@@ -186,17 +328,97 @@ class PoolModel:
             getByType('BODY') will return the object of type 'BODY'
             getByType('BODY','SPA') will only return the Spa
         """
-        return list(
-            filter(
-                lambda object: object.objtype == type
-                and (not subtype or object.subtype == subtype),
-                self,
-            )
-        )
+        objects = self._byType.get(type, {}).get(subtype or None, {})
+        return list(objects.values())
 
     def getChildren(self, object: PoolObject) -> List[PoolObject]:
         """Return the children of a given object."""
-        return list(filter(lambda v: v[PARENT_ATTR] == object.objnam, self))
+        return list(self._children.get(object.objnam, {}).values())
+
+    def getReferrers(self, objnam: str, attribute: str = None) -> List[PoolObject]:
+        """Return the objects referring to a given object.
+
+        examples:
+            getReferrers('B1101', 'BODY') returns the heaters, pumps...
+            serving the body B1101
+            getReferrers('C0003') returns the objects referring to
+            the circuit C0003 through any of the REFERENCE_ATTRIBUTES
+        """
+        byAttribute = self._referrers.get(objnam, {})
+        if attribute:
+            return list(byAttribute.get(attribute, {}).values())
+        result = {}
+        for objects in byAttribute.values():
+            result.update(objects)
+        return list(result.values())
+
+    def _index(self, object: PoolObject) -> None:
+        """Add an object to the indexes."""
+        # called for every object added: avoid creating dicts needlessly
+        objnam = object.objnam
+        byType = self._byType.get(object.objtype)
+        if byType is None:
+            byType = self._byType[object.objtype] = {None: {}}
+        byType[None][objnam] = object
+        subtype = object.subtype
+        if subtype:
+            objects = byType.get(subtype)
+            if objects is None:
+                objects = byType[subtype] = {}
+            objects[objnam] = object
+        parent = object[PARENT_ATTR]
+        if parent:
+            children = self._children.get(parent)
+            if children is None:
+                children = self._children[parent] = {}
+            children[objnam] = object
+        for attribute in REFERENCE_ATTRIBUTES:
+            for target in object.references(attribute):
+                byAttribute = self._referrers.get(target)
+                if byAttribute is None:
+                    byAttribute = self._referrers[target] = {}
+                referrers = byAttribute.get(attribute)
+                if referrers is None:
+                    referrers = byAttribute[attribute] = {}
+                referrers[objnam] = object
+
+    def _unindex(self, object: PoolObject) -> None:
+        """Remove an object from the indexes."""
+        byType = self._byType.get(object.objtype, {})
+        for subtype in (None, object.subtype):
+            objects = byType.get(subtype)
+            if objects:
+                objects.pop(object.objnam, None)
+                if not objects:
+                    del byType[subtype]
+        if not byType:
+            self._byType.pop(object.objtype, None)
+        parent = object[PARENT_ATTR]
+        children = self._children.get(parent)
+        if children:
+            children.pop(object.objnam, None)
+            if not children:
+                del self._children[parent]
+        for attribute in REFERENCE_ATTRIBUTES:
+            for target in object.references(attribute):
+                byAttribute = self._referrers.get(target, {})
+                referrers = byAttribute.get(attribute)
+                if referrers:
+                    referrers.pop(object.objnam, None)
+                    if not referrers:
+                        del byAttribute[attribute]
+                if not byAttribute:
+                    self._referrers.pop(target, None)
+
+    def _updateObject(self, object: PoolObject, params: dict) -> dict:
+        """Update an object of the model, and its indexes, return the changes."""
+        if INDEXED_ATTRIBUTES.isdisjoint(params):
+            return object.update(params)
+        # rare: the object moves in the indexes
+        self._unindex(object)
+        changed = object.update(params)
+        self._index(object)
+        return changed
 
     def addObject(self, objnam, params):
         """Update the model with a new object."""
@@ -205,15 +427,16 @@ class PoolModel:
         object = self._objects.get(objnam)
 
         if not object:
-            object = PoolObject(objnam, params)
+            object = PoolObject(objnam, params, self._parseErrors)
             if object.objtype == "SYSTEM":
                 self._systemObject = object
             if object.objtype in self._attributeMap:
                 self._objects[objnam] = object
+                self._index(object)
             else:
                 object = None
         else:
-            object.update(params)
+            self._updateObject(object, params)
         return object
 
     def addObjects(self, objList: list):
@@ -221,15 +444,58 @@ class PoolModel:
         for elt in objList:
             self.addObject(elt["objnam"], elt["params"])
 
+    def matchesInventory(self, objList: list) -> bool:
+        """Return True if the model holds exactly the objects listed.
+
+        each object of objList comes with its OBJTYP which must match the
+        one in the model, as must its SUBTYP and PARENT when listed
+        """
+        matched = 0
+        for elt in objList:
+            params = elt["params"]
+            if params.get(OBJTYP_ATTR) not in self._attributeMap:
+                # not a type we keep in the model
+                continue
+            object = self._objects.get(elt["objnam"])
+            if (
+                not object
+                or object.objtype != params[OBJTYP_ATTR]
+                or (SUBTYP_ATTR in params and object.subtype != params[SUBTYP_ATTR])
+                or (
+                    PARENT_ATTR in params and object[PARENT_ATTR] != params[PARENT_ATTR]
+                )
+            ):
+                return False
+            matched += 1
+        return matched == len(self._objects)
+
+    def removeObject(self, objnam) -> PoolObject:
+        """Remove an object from the model and return it."""
+        object = self._objects.pop(objnam, None)
+        if object is not None:
+            self._unindex(object)
+            if object is self._systemObject:
+                self._systemObject = None
+        return object
+
+    def snapshot(self) -> list:
+        """Return a copy of all the objects, which addObjects can restore."""
+        return [object.asDict() for object in self]
+
+    def attributesOf(self, objtype: str):
+        """Return the attributes the model tracks for a type of object."""
+        attributes = self._attributeMap.get(objtype)
+        if not attributes:
+            # if we don't specify a set of attributes for this object type
+            # we will default to all know attributes for this type
+            attributes = ALL_ATTRIBUTES_BY_TYPE.get(objtype)
+        return attributes or []
+
     def attributesToTrack(self):
         """Return all the object/attributes we want to track."""
         query = []
         for object in self.objectList:
-            attributes = self._attributeMap.get(object.objtype)
-            if not attributes:
-                # if we don't specify a set of attributes for this object type
-                # we will default to all know attributes for this type
-                attributes = ALL_ATTRIBUTES_BY_TYPE.get(object.objtype)
+            attributes = self.attributesOf(object.objtype)
             if attributes:
                 query.append({"objnam": object.objnam, "keys": list(attributes)})
         return query
@@ -241,7 +507,7 @@ class PoolModel:
             objnam = update["objnam"]
             object = self._objects.get(objnam)
             if object:
-                changed = object.update(update["params"])
+                changed = self._updateObject(object, update["params"])
                 if changed:
                     updated[objnam] = changed
         return updated
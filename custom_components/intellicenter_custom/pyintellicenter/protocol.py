@@ -1,9 +1,14 @@
 """Protocol for communicating with a Pentair system."""
 
 import asyncio
-import json
+from collections import deque
 import logging
-from queue import SimpleQueue
+import time
+from typing import Optional
+
+from . import codec
+from .recorder import RECEIVED, SENT
+from .tracing import WIRE_LOGGER
 
 _LOGGER = logging.getLogger(__name__)
 # _LOGGER.setLevel(logging.DEBUG)
@@ -11,44 +16,302 @@ _LOGGER = logging.getLogger(__name__)
 # ---------------------------------------------------------------------------
 
 
+class LineFramer:
+    """Split a stream of bytes into the CRLF delimited lines sent by Pentair.
+
+    Data is accumulated in a bytearray and only the unfinished tail of the
+    stream is kept between calls. The search for delimiters resumes where the
+    previous one stopped so a large reply received in many small chunks is
+    scanned only once.
+
+    Lines are returned as bytes: since the delimiter is plain ASCII, it can
+    never appear inside a multibyte UTF-8 sequence so a character split across
+    two TCP segments is always decoded as a whole once its line is complete.
+    """
+
+    DELIMITER = b"\r\n"
+
+    def __init__(self):
+        """Initialize an empty framer."""
+        self._buffer = bytearray()
+        # position from which the next search for a delimiter starts
+        self._scanFrom = 0
+
+    @property
+    def pending(self) -> int:
+        """Return the number of bytes waiting for the end of their line."""
+        return len(self._buffer)
+
+    def reset(self) -> None:
+        """Discard any partial line."""
+        self._buffer.clear()
+        self._scanFrom = 0
+
+    def feed(self, data: bytes) -> list:
+        """Add data to the buffer and return the (possibly empty) list of full lines."""
+
+        buffer = self._buffer
+        buffer += data
+
+        lines = []
+        start = 0
+        pos = buffer.find(self.DELIMITER, self._scanFrom)
+        while pos != -1:
+            # skip empty lines
+            if pos > start:
+                lines.append(bytes(buffer[start:pos]))
+            start = pos + 2
+            pos = buffer.find(self.DELIMITER, start)
+
+        if start:
+            del buffer[:start]
+
+        # the last byte might be the first half of a delimiter
+        self._scanFrom = max(len(buffer) - 1, 0)
+
+        return lines
+
+
+# ---------------------------------------------------------------------------
+
+# priority classes for outgoing requests, lower is served first
+PRIORITY_INTERACTIVE = 0  # changes requested by the user
+PRIORITY_QUERY = 1  # requests for information
+PRIORITY_BULK = 2  # subscriptions, heartbeats...
+
+# the priority of a request when the sender does not specify one
+COMMAND_PRIORITIES = {
+    "SETPARAMLIST": PRIORITY_INTERACTIVE,
+    "GetParamList": PRIORITY_QUERY,
+    "GetQuery": PRIORITY_QUERY,
+    "RequestParamList": PRIORITY_BULK,
+    "ReleaseParamList": PRIORITY_BULK,
+}
+
+
+class RequestQueue:
+    """A queue of outgoing requests served by priority class.
+
+    Requests of a given class are served in order. To avoid starvation
+    a class which has been passed over maxSkips times in favor of a more
+    urgent one is served next, whatever is waiting ahead of it.
+    """
+
+    def __init__(self, maxSkips: int = 4):
+        """Initialize an empty queue."""
+        self._queues = [deque() for _ in range(PRIORITY_BULK + 1)]
+        self._skipped = [0] * len(self._queues)
+        self._maxSkips = maxSkips
+        self._size = 0
+        self.promotions = 0
+
+    def __len__(self) -> int:
+        """Return the number of queued requests."""
+        return self._size
+
+    def empty(self) -> bool:
+        """Return True if no request is waiting."""
+        return self._size == 0
+
+    def qsize(self) -> int:
+        """Return the number of queued requests."""
+        return self._size
+
+    def sizes(self) -> list:
+        """Return the number of queued requests for each priority class."""
+        return [len(queue) for queue in self._queues]
+
+    def put(self, request, priority: int = PRIORITY_QUERY) -> None:
+        """Queue a request in a given priority class."""
+        priority = min(max(priority, PRIORITY_INTERACTIVE), PRIORITY_BULK)
+        self._queues[priority].append(request)
+        self._size += 1
+
+    def get(self):
+        """Remove and return the next request to send."""
+
+        queues = self._queues
+
+        selected = None
+        # first look for a starving class, least urgent first
+        for priority in range(len(queues) - 1, PRIORITY_INTERACTIVE, -1):
+            if queues[priority] and self._skipped[priority] >= self._maxSkips:
+                selected = priority
+                self.promotions += 1
+                break
+
+        if selected is None:
+            selected = next(priority for priority, queue in enumerate(queues) if queue)
+
+        # every less urgent class still waiting has been skipped once more
+        for priority in range(selected + 1, len(queues)):
+            if queues[priority]:
+                self._skipped[priority] += 1
+        self._skipped[selected] = 0
+
+        self._size -= 1
+        return queues[selected].popleft()
+
+
+# ---------------------------------------------------------------------------
+
+
+class RoundTripTimes:
+    """A bounded record of the most recent round trip times (in seconds)."""
+
+    def __init__(self, maxSamples: int = 256):
+        """Initialize an empty record."""
+        self._samples = deque(maxlen=maxSamples)
+        self._count = 0
+
+    def __len__(self) -> int:
+        """Return the number of samples currently held."""
+        return len(self._samples)
+
+    @property
+    def count(self) -> int:
+        """Return the total number of samples ever recorded."""
+        return self._count
+
+    @property
+    def last(self):
+        """Return the most recent sample or None."""
+        return self._samples[-1] if self._samples else None
+
+    def record(self, rtt: float) -> None:
+        """Add a sample, forgetting the oldest one if the record is full."""
+        self._samples.append(rtt)
+        self._count += 1
+
+    def percentile(self, pct: float):
+        """Return the given percentile (0-100) of the samples held or None."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self) -> dict:
+        """Return count, last, p50, p95, p99 and max (in milliseconds)."""
+        if not self._samples:
+            return {"count": self._count}
+        return {
+            "count": self._count,
+            "last": round(self._samples[-1] * 1000, 2),
+            "p50": round(self.percentile(50) * 1000, 2),
+            "p95": round(self.percentile(95) * 1000, 2),
+            "p99": round(self.percentile(99) * 1000, 2),
+            "max": round(max(self._samples) * 1000, 2),
+        }
+
+
+# ---------------------------------------------------------------------------
+
+
 class ICProtocol(asyncio.Protocol):
     """The ICProtocol handles the low level protocol with a Pentair system.
 
     In particular, it takes care of the following:
     - generating unique msg ids for outgoing requests
     - receiving data from the transport and combining it into a proper json object
+    - queuing outgoing requests by priority class (see RequestQueue)
+    - merging changes (SETPARAMLIST) into the one still waiting in the queue, if any
     - managing a 'only-one-request-out-one-the-wire' policy
     this is more a "works better that way" thand a real requirement as far as know
-    - sending regular (every 10s) 'ping' requests and closing the connection if 'pong'
-    replies are not received fast enough (we allow 2 outstanding which is generous)
+    when maxInFlight is greater than 1, up to that many requests can be on the wire:
+    the window starts at 1, grows while responses are healthy and shrinks on errors
+    or when a response does not come back within responseTimeout seconds
+    - sending a 'ping' request when nothing was received for 10s and closing the
+    connection if 'pong' replies are not received fast enough (each ping is given
+    pongTimeout seconds, we allow 2 unanswered): a busy connection is never pinged
+    pings bypass the request queue and their round trip times are recorded
+    - optionally, recording the traffic to a capture file (see recorder.py)
     """
 
-    def __init__(self, controller):
-        """Initialize a protocol for a IntelliCenter system."""
+    def __init__(
+        self,
+        controller,
+        maxInFlight: int = 1,
+        responseTimeout: float = 30,
+        keepaliveInterval: float = 10,
+        maxUnackedPings: int = 2,
+        pongTimeout: float = 5,
+        recorder=None,
+        msgIDs=None,
+    ):
+        """Initialize a protocol for a IntelliCenter system.
+
+        a keepaliveInterval of 0 disables the pings
+        recorder is an optional TrafficRecorder capturing every line
+        msgIDs is an optional iterator of message IDs shared with other
+        connections to the same system, so their IDs never collide
+        """
 
         self._controller = controller
+        self._recorder = recorder
 
         self._transport = None
+        self._loop = None
 
         # counter used to generate messageIDs
         self._msgID = 1
+        self._msgIDs = msgIDs
 
-        # buffer used to accumulate data received before splitting into lines
-        self._lineBuffer = ""
+        # accumulates data received before splitting it into lines
+        self._framer = LineFramer()
 
-        # state variable and queue for flow control
+        # state variables and queue for flow control
         # see sendRequest and responseReceived for details
-        self._out_pending = 0
-        self._out_queue = SimpleQueue()
+        self._maxInFlight = max(1, maxInFlight)
+        self._window = 1
+        self._healthyResponses = 0
+        self._responseTimeout = responseTimeout
+        self._timeoutHandle = None
+        # (time sent, msg_id) of each request currently on the wire, oldest first
+        self._in_flight = deque()
+        # msg_ids of the requests recently timed out, to drop their late responses
+        self._timedOut = deque(maxlen=100)
+        self._out_queue = RequestQueue()
+        # the queued SETPARAMLIST request later changes are merged into
+        self._pendingWrite = None
+
+        # counters reported by the stats property
+        self._stats = {
+            "requests": 0,
+            "responses": 0,
+            "errors": 0,
+            "timeouts": 0,
+            "lateResponses": 0,
+            "unmatchedResponses": 0,
+            "peakInFlight": 0,
+            "coalesced": 0,
+            "windowGrown": 0,
+            "windowShrunk": 0,
+        }
 
         # and the number of unacknowledgged ping issued
         self._num_unacked_pings = 0
+        self._keepaliveInterval = keepaliveInterval
+        self._maxUnackedPings = maxUnackedPings
+        self._pongTimeout = pongTimeout
+        self._keepaliveTask = None
+        # the time at which each unacknowledged ping was sent
+        # and the future resolved when its pong is received
+        self._ping_times = deque()
+        self._rtt = RoundTripTimes()
+        # when something was last received from the system
+        self._lastReceived = time.monotonic()
 
     def connection_made(self, transport):
         """Handle the callback for a successful connection."""
 
         self._transport = transport
+        self._loop = asyncio.get_event_loop()
         self._msgID = 1
+        self._lastReceived = time.monotonic()
+
+        if self._keepaliveInterval:
+            self._keepaliveTask = self._loop.create_task(self._keepalive())
 
         # and notify our controller that we are ready!
         self._controller.connection_made(self, transport)
@@ -56,90 +319,309 @@ class ICProtocol(asyncio.Protocol):
     def connection_lost(self, exc):
         """Handle the callback for connection lost."""
 
-        self._controller.connection_lost(exc)
+        if self._timeoutHandle:
+            self._timeoutHandle.cancel()
+            self._timeoutHandle = None
+        if self._keepaliveTask:
+            self._keepaliveTask.cancel()
+            self._keepaliveTask = None
+        for _, future in self._ping_times:
+            if future and not future.done():
+                future.set_exception(ConnectionError("connection lost"))
+        self._ping_times.clear()
+        if self._recorder:
+            self._recorder.flush()
+
+        if self._controller:
+            self._controller.connection_lost(exc, self)
+
+    def detach(self) -> None:
+        """Stop reporting anything to the controller, before closing the connection."""
+        self._controller = None
+
+    async def _keepalive(self) -> None:
+        """Ping the system when quiet and close the connection if it stops answering.
+
+        any traffic received proves the system is alive so it is only pinged
+        once nothing was received for an interval, each ping is then given
+        pongTimeout seconds to be answered before another one is sent
+        """
+        while self._transport:
+            await asyncio.sleep(max(0, self._keepaliveInterval - self.silence))
+            if not self._transport:
+                break
+            if self.silence < self._keepaliveInterval:
+                continue
+            if self._num_unacked_pings >= self._maxUnackedPings:
+                _LOGGER.warning(
+                    "PROTOCOL: %s pings unanswered, closing", self._num_unacked_pings
+                )
+                self._keepaliveTask = None
+                self._transport.close()
+                break
+            self.sendPing(withFuture=False)
+            await asyncio.sleep(self._pongTimeout)
+
+    def sendPing(self, withFuture: bool = True) -> Optional[asyncio.Future]:
+        """Send a 'ping', the system answers with 'pong'.
+
+        return a future resolved with the round trip time when it does
+        (unless withFuture is False)
+        """
+        future = self._loop.create_future() if self._loop and withFuture else None
+        self._ping_times.append((time.monotonic(), future))
+        self._num_unacked_pings += 1
+        self._writeToTransport(b"ping")
+        return future
+
+    @property
+    def silence(self) -> float:
+        """Return the number of seconds since something was last received."""
+        return time.monotonic() - self._lastReceived
+
+    @property
+    def rtt(self) -> RoundTripTimes:
+        """Return the round trip times measured by the pings."""
+        return self._rtt
+
+    @property
+    def window(self) -> int:
+        """Return the number of requests currently allowed on the wire."""
+        return self._window
+
+    @property
+    def maxInFlight(self) -> int:
+        """Return the maximum size of the window."""
+        return self._maxInFlight
+
+    @property
+    def idle(self) -> bool:
+        """Return True if no request is on the wire or waiting to be sent."""
+        return not self._in_flight and self._out_queue.empty()
+
+    @property
+    def stats(self) -> dict:
+        """Return the flow control counters for this connection."""
+        return {
+            **self._stats,
+            "window": self._window,
+            "maxInFlight": self._maxInFlight,
+            "inFlight": len(self._in_flight),
+            "queued": self._out_queue.qsize(),
+            "queuedByPriority": self._out_queue.sizes(),
+            "starvationPromotions": self._out_queue.promotions,
+            "unackedPings": self._num_unacked_pings,
+            "rtt": self._rtt.summary(),
+        }
 
     def data_received(self, data) -> None:
         """Handle the callback for data received."""
 
-        data = data.decode()
-        _LOGGER.debug(f"PROTOCOL: received from transport: {data}")
+        if WIRE_LOGGER.isEnabledFor(logging.DEBUG):
+            WIRE_LOGGER.debug("PROTOCOL: received from transport: %s", data)
 
         # "packets" from Pentair are organized by lines
-        # so wait until at least a full line is received
-        self._lineBuffer += data
-
-        if not self._lineBuffer.endswith("\r\n"):
-            return
-
-        # there might have been more than one "packet" in our current buffer
-        # so let's split them
-
-        lines = str.split(self._lineBuffer, "\r\n")
-        self._lineBuffer = ""
-
-        for line in lines:
-            if line:
-                # and process each line individually
-                self.processMessage(line)
-
-    def sendCmd(self, cmd: str, extra: dict = None) -> str:
-        """Send a command and return a generated msg id."""
-        msg_id = str(self._msgID)
+        # there might be more than one in a chunk and the last one
+        # can be incomplete: the framer returns the complete ones
+        # and keeps the remainder until the rest of it is received
+        self._lastReceived = time.monotonic()
+        for line in self._framer.feed(data):
+            if self._recorder:
+                self._recorder.record(RECEIVED, line)
+            # and process each line individually
+            self.processMessage(line)
+
+    def sendCmd(self, cmd: str, extra: dict = None, priority: int = None) -> str:
+        """Send a command and return a generated msg id.
+
+        if priority is not specified, it is derived from the command
+        """
+        if cmd == "SETPARAMLIST" and self._pendingWrite and extra:
+            # a change is still waiting in the queue: merge into it
+            # the caller will get the result of the combined request
+            self._mergeWrite(self._pendingWrite, extra.get("objectList", []))
+            self._stats["coalesced"] += 1
+            return self._pendingWrite["messageID"]
+
+        if self._msgIDs is not None:
+            msg_id = str(next(self._msgIDs))
+        else:
+            msg_id = str(self._msgID)
+            self._msgID = self._msgID + 1
         dict = {"messageID": msg_id, "command": cmd}
         if extra:
             dict.update(extra)
-        self._msgID = self._msgID + 1
-        packet = json.dumps(dict)
-        self.sendRequest(packet)
+        if priority is None:
+            priority = COMMAND_PRIORITIES.get(cmd, PRIORITY_QUERY)
+        if self.sendRequest(dict, priority) and cmd == "SETPARAMLIST":
+            # the request was queued, later changes can be merged into it
+            # we work on a copy as we are about to modify its content
+            dict["objectList"] = []
+            self._mergeWrite(dict, extra.get("objectList", []) if extra else [])
+            self._pendingWrite = dict
 
         return str(msg_id)
 
-    def _writeToTransport(self, request):
-        _LOGGER.debug(
-            f"PROTOCOL: writing to transport: (size {len(request)}): {request}"
-        )
-        self._transport.write(request.encode())
-
-    def sendRequest(self, request: str) -> None:
-        """Either send the request to the wire or queue it for later."""
+    @staticmethod
+    def _mergeWrite(request: dict, objectList: list) -> None:
+        """Merge changes into a queued SETPARAMLIST, last value wins."""
+        for item in objectList:
+            for entry in request["objectList"]:
+                if entry["objnam"] == item["objnam"]:
+                    entry["params"].update(item["params"])
+                    break
+            else:
+                request["objectList"].append(
+                    {"objnam": item["objnam"], "params": dict(item["params"])}
+                )
+
+    def _writeToTransport(self, request: bytes):
+        if WIRE_LOGGER.isEnabledFor(logging.DEBUG):
+            WIRE_LOGGER.debug(
+                "PROTOCOL: writing to transport: (size %d): %s", len(request), request
+            )
+        if self._recorder:
+            self._recorder.record(SENT, request)
+        self._transport.write(request)
+
+    def sendRequest(self, request: dict, priority: int = PRIORITY_QUERY) -> bool:
+        """Either send the request to the wire or queue it for later.
+
+        return True if the request has been queued
+        """
 
         # IntelliCenter seems to struggle to parse requests coming too fast
-        # so we throttle back to one request on the wire at a time
+        # so we throttle back to a (small) number of requests on the wire at a time
         # see responseReceived() for the other side of the flow control
 
-        if self._out_pending == 0:
-            # nothing is progress, we can transmit the packet
-            self._writeToTransport(request)
+        self._stats["requests"] += 1
+
+        if len(self._in_flight) < self._window and self._out_queue.empty():
+            # there is room on the wire, we can transmit the packet
+            self._transmit(request)
+            return False
+
+        # the window is full, let's queue the request
+        self._out_queue.put(request, priority)
+        return True
+
+    def _transmit(self, request: dict) -> None:
+        """Write a request and account for it in the window."""
+        if request is self._pendingWrite:
+            # too late to merge anything into it
+            self._pendingWrite = None
+        self._in_flight.append((time.monotonic(), request["messageID"]))
+        self._stats["peakInFlight"] = max(
+            self._stats["peakInFlight"], len(self._in_flight)
+        )
+        self._writeToTransport(codec.encode(request))
+
+        if self._responseTimeout and self._loop and not self._timeoutHandle:
+            self._timeoutHandle = self._loop.call_later(
+                self._responseTimeout, self._checkTimeouts
+            )
+
+    def _fillWindow(self) -> None:
+        """Transmit queued requests while the window allows it."""
+        while len(self._in_flight) < self._window and not self._out_queue.empty():
+            self._transmit(self._out_queue.get())
+
+    def _growWindow(self) -> None:
+        """Account for a healthy response, widening the window every 'window' of them."""
+        self._healthyResponses += 1
+        if self._window < self._maxInFlight and self._healthyResponses >= self._window:
+            self._window += 1
+            self._healthyResponses = 0
+            self._stats["windowGrown"] += 1
+            _LOGGER.debug("PROTOCOL: window grown to %d", self._window)
+
+    def _shrinkWindow(self) -> None:
+        """Halve the window after an error or a timeout."""
+        self._healthyResponses = 0
+        if self._window > 1:
+            self._window = max(1, self._window // 2)
+            self._stats["windowShrunk"] += 1
+            _LOGGER.debug("PROTOCOL: window shrunk to %d", self._window)
+
+    def _checkTimeouts(self) -> None:
+        """Reclaim the slots of requests whose response never came back."""
+        self._timeoutHandle = None
+
+        now = time.monotonic()
+        expired = 0
+        while self._in_flight and now - self._in_flight[0][0] >= self._responseTimeout:
+            self._timedOut.append(self._in_flight.popleft()[1])
+            expired += 1
+
+        if expired:
+            _LOGGER.warning(f"PROTOCOL: {expired} request(s) timed out")
+            self._stats["timeouts"] += expired
+            self._shrinkWindow()
+            self._fillWindow()
+
+        if self._in_flight and self._transport:
+            delay = self._responseTimeout - (now - self._in_flight[0][0])
+            self._timeoutHandle = self._loop.call_later(
+                max(delay, 0), self._checkTimeouts
+            )
+
+    def responseReceived(
+        self, success: bool = True, msg_id: str = None
+    ) -> Optional[str]:
+        """Handle the flow control part of a received response.
+
+        return the msg_id of the request in flight the response accounts for
+        """
+
+        matched = None
+        for index, (_, inFlightID) in enumerate(self._in_flight):
+            if inFlightID == msg_id:
+                del self._in_flight[index]
+                matched = msg_id
+                break
         else:
-            # there is already something on the wire, let's queue the request
-            self._out_queue.put(request)
-
-        # and count the new request as pending
-        self._out_pending += 1
-
-    def responseReceived(self) -> None:
-        """Handle the flow control part of a received rsponse."""
+            if msg_id in self._timedOut:
+                # its slot was already reclaimed by _checkTimeouts
+                self._timedOut.remove(msg_id)
+                self._stats["lateResponses"] += 1
+                return None
+            if success or not self._in_flight:
+                # nothing on the wire it could be for
+                self._stats["unmatchedResponses"] += 1
+                return None
+            # the messageID of an error cannot be relied upon (see processMessage)
+            # so one matching no request in flight is assumed to be for the oldest
+            matched = self._in_flight.popleft()[1]
+
+        self._stats["responses"] += 1
+        if success:
+            self._growWindow()
+        else:
+            self._stats["errors"] += 1
+            self._shrinkWindow()
 
-        # we know that a response has been received
-        # so, if we have a pending request in the queue
-        # we can write it to our transport
-        if not self._out_queue.empty():
-            request = self._out_queue.get()
-            self._writeToTransport(request)
-        # no matter what, we have now one less request pending
-        if self._out_pending:
-            self._out_pending -= 1
+        # now that we have one less request pending
+        # we can write the queued requests that fit in the window
+        self._fillWindow()
+        return matched
 
-    def processMessage(self, message: str) -> None:
-        """Process a given message from IntelliCenter."""
+    def processMessage(self, message: bytes) -> None:
+        """Process a given message (a line, as bytes or str) from IntelliCenter."""
 
-        _LOGGER.debug(f"PROTOCOL: processMessage {message}")
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("PROTOCOL: processMessage %s", message)
 
         # if message is 'pong', response for a previous 'ping'
-        # do nothing except noting a response was received
-        if message == "pong":
-            self.responseReceived()
-            self._num_unacked_pings -= 1
+        # do nothing except recording how long it took
+        # (pings are not part of the flow control)
+        if message == b"pong" or message == "pong":
+            if self._ping_times:
+                sent, future = self._ping_times.popleft()
+                rtt = time.monotonic() - sent
+                self._rtt.record(rtt)
+                self._num_unacked_pings -= 1
+                if future and not future.done():
+                    future.set_result(rtt)
             _LOGGER.debug("ping acknowledged")
             return
 
@@ -149,7 +631,7 @@ class ICProtocol(asyncio.Protocol):
         try:
             # the message is excepted to be a JSON object
 
-            msg = json.loads(message)
+            msg = codec.decode(message)
 
             # with a minimum of a messageID and a command
             # NOTE: there seems to be a bug in IntelliCenter where
@@ -163,11 +645,15 @@ class ICProtocol(asyncio.Protocol):
             # the response field is only present when the message is a response to
             # a request (as opposed to a 'notification')
             # if so, we also not that a response was received
+            oldest = None
             if response:
-                self.responseReceived()
+                oldest = self.responseReceived(response == "200", msg_id)
 
             # let's pass our message back to the controller for handling its semantic...
-            self._controller.receivedMessage(msg_id, command, response, msg)
+            if self._controller:
+                self._controller.receivedMessage(
+                    msg_id, command, response, msg, oldest=oldest
+                )
 
         except Exception as err:
             _LOGGER.error(f"PROTOCOL: exception while receiving message {err}")
@@ -0,0 +1,163 @@
+"""Capture of the traffic exchanged with a Pentair system.
+
+A TrafficRecorder given to the controller (or directly to ICProtocol)
+appends every line sent and received to a gzip compressed capture file:
+
+    # pyintellicenter capture 1 2024-06-01T12:00:00.000000+00:00
+    0.000213 > {"messageID":"1","command":"GetParamList",...}
+    0.012871 < {"command":"SendParamList","messageID":"1",...}
+
+each record holds the number of seconds (monotonic) since the recorder was
+created, the direction ('>' sent, '<' received) and the line itself. The
+header gives the wall clock time of the origin of the timestamps.
+
+When a file grows beyond maxBytes (uncompressed) it is rotated like the
+logging.handlers.RotatingFileHandler does: capture.gz becomes capture.gz.1,
+capture.gz.1 becomes capture.gz.2 and so on up to backupCount files.
+
+See replay.py to feed a capture back into a ModelController.
+"""
+
+from datetime import datetime, timezone
+import gzip
+import logging
+import os
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+VERSION = 1
+
+SENT = b">"
+RECEIVED = b"<"
+
+# ---------------------------------------------------------------------------
+
+
+class TrafficRecorder:
+    """Append the lines exchanged with a system to a rotating capture file."""
+
+    def __init__(
+        self,
+        path: str,
+        maxBytes: int = 20 * 1024 * 1024,
+        backupCount: int = 5,
+        compressLevel: int = 6,
+    ):
+        """Initialize the recorder, the capture file is opened on first use.
+
+        a maxBytes of 0 disables the rotation
+        """
+        self._path = path
+        self._maxBytes = maxBytes
+        self._backupCount = backupCount
+        self._compressLevel = compressLevel
+
+        # all timestamps are relative to that origin
+        self._origin = time.monotonic()
+        self._wallOrigin = datetime.now(timezone.utc).isoformat()
+
+        self._file = None
+        # the number of (uncompressed) bytes written to the current file
+        self._size = 0
+        self._records = 0
+
+    @property
+    def path(self) -> str:
+        """Return the path of the current capture file."""
+        return self._path
+
+    @property
+    def records(self) -> int:
+        """Return the number of records written so far."""
+        return self._records
+
+    def _open(self) -> None:
+        """Open a new capture file and write its header."""
+        self._file = gzip.open(self._path, "wb", compresslevel=self._compressLevel)
+        self._size = 0
+        self._write(
+            f"# pyintellicenter capture {VERSION} {self._wallOrigin}\n".encode()
+        )
+
+    def _write(self, data: bytes) -> None:
+        self._file.write(data)
+        self._size += len(data)
+
+    def _shift(self) -> None:
+        """Shift the existing files to make room for a new one."""
+        if self._backupCount > 0:
+            for index in range(self._backupCount - 1, 0, -1):
+                source = f"{self._path}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self._path}.{index + 1}")
+            os.replace(self._path, f"{self._path}.1")
+
+    def record(self, direction: bytes, line: bytes) -> None:
+        """Append a line sent (SENT) or received (RECEIVED) to the capture."""
+        try:
+            if self._file is None:
+                # do not overwrite a previous capture
+                if os.path.exists(self._path):
+                    self._shift()
+                self._open()
+            elif self._maxBytes and self._size >= self._maxBytes:
+                self._file.close()
+                self._shift()
+                self._open()
+            self._write(
+                b"%.6f %s %s\n"
+                % (time.monotonic() - self._origin, direction, bytes(line))
+            )
+            self._records += 1
+        except OSError as err:
+            # the capture is a debugging aid: never let it break the connection
+            _LOGGER.error(f"RECORDER: cannot write to {self._path}: {err}")
+            self.close()
+
+    def flush(self) -> None:
+        """Write the buffered records to disk."""
+        if self._file:
+            self._file.flush()
+
+    def close(self) -> None:
+        """Close the capture file, a later record opens a new one."""
+        if self._file:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+
+# ---------------------------------------------------------------------------
+
+
+def captureFiles(path: str) -> list:
+    """Return the files of a rotated capture, the oldest first."""
+    files = [path]
+    index = 1
+    while os.path.exists(f"{path}.{index}"):
+        files.append(f"{path}.{index}")
+        index += 1
+    return [file for file in reversed(files) if os.path.exists(file)]
+
+
+def readCapture(path: str):
+    """Iterate over the (timestamp, direction, line) records of a capture.
+
+    the files of a rotated capture are read in order, an incomplete
+    last record is ignored
+    """
+    for file in captureFiles(path):
+        with gzip.open(file, "rb") as capture:
+            try:
+                for record in capture:
+                    if record.startswith(b"#") or not record.endswith(b"\n"):
+                        continue
+                    timestamp, direction, line = record[:-1].split(b" ", 2)
+                    yield float(timestamp), direction, line
+            except EOFError:
+                # the capture is still being written or was not closed
+                # (which is typical after a crash): stop at what was flushed
+                pass
@@ -0,0 +1,180 @@
+"""Replay of a traffic capture (see recorder.py) into a ModelController.
+
+The lines received from the system are fed, in order, to an ICProtocol
+which parses them and hands them to the controller, exactly like a live
+connection would: the model is built from the responses to the requests
+issued by ModelController.start and updated by the notifications, and the
+controller's update callback is invoked for every change.
+
+No connection is made and nothing is sent: the lines sent to the system
+are only used to know which request each response belongs to.
+
+The replay runs either as fast as possible (to benchmark parsing, model
+updates and dispatching on real traffic) or paced by the timestamps of the
+capture (to reproduce an incident in real time). From the
+custom_components/intellicenter_custom directory:
+
+    python -m pyintellicenter.replay capture.gz --speed 1
+"""
+
+import argparse
+import asyncio
+import time
+
+from . import codec
+from .attributes import OBJTYP_ATTR, SYSTEM_TYPE
+from .controller import ModelController, SystemInfo, prune
+from .model import PoolModel
+from .protocol import ICProtocol
+from .recorder import RECEIVED, SENT, readCapture
+
+# ---------------------------------------------------------------------------
+
+
+class _PendingRequest:
+    """Stand in for the Future of a request issued during the capture.
+
+    the controller resolves it synchronously so the response is applied
+    before the next line of the capture is processed
+    """
+
+    def __init__(self, driver, request: dict):
+        self._driver = driver
+        self._request = request
+
+    def done(self) -> bool:
+        return False
+
+    def cancel(self) -> None:
+        pass
+
+    def set_result(self, msg: dict) -> None:
+        self._driver.responseReceived(self._request, msg)
+
+    def set_exception(self, exc) -> None:
+        self._driver._stats["errors"] += 1
+
+
+# ---------------------------------------------------------------------------
+
+
+class ReplayDriver:
+    """Feed a traffic capture to a ModelController."""
+
+    def __init__(self, controller: ModelController = None):
+        """Initialize the driver.
+
+        if no controller is given, one is created with an empty model
+        """
+        self._controller = controller or ModelController("replay", PoolModel())
+        self._protocol = ICProtocol(
+            self._controller, keepaliveInterval=0, responseTimeout=0
+        )
+        self._stats = {"sent": 0, "received": 0, "responses": 0, "errors": 0}
+
+    @property
+    def controller(self) -> ModelController:
+        """Return the controller the capture is replayed into."""
+        return self._controller
+
+    @property
+    def stats(self) -> dict:
+        """Return the number of lines and responses processed."""
+        return dict(self._stats)
+
+    def feed(self, direction: bytes, line: bytes) -> None:
+        """Process one record of a capture."""
+        if line == b"ping" or line == b"pong":
+            return
+        if direction == SENT:
+            self._stats["sent"] += 1
+            self.requestSent(codec.decode(line))
+        elif direction == RECEIVED:
+            self._stats["received"] += 1
+            self._protocol.processMessage(line)
+
+    def requestSent(self, request: dict) -> None:
+        """Get ready to handle the response to a request from the capture."""
+        msg_id = request["messageID"]
+        # message IDs restart with each connection and the response
+        # to a request made before a disconnection never comes
+        self._controller._requests.pop(msg_id, None)
+        self._controller._trackRequest(msg_id, _PendingRequest(self, request))
+
+    def responseReceived(self, request: dict, msg: dict) -> None:
+        """Do what the original caller of the request did with its response."""
+        self._stats["responses"] += 1
+        command = request["command"]
+        controller = self._controller
+
+        if command == "GetParamList":
+            if request.get("condition") == f"{OBJTYP_ATTR}={SYSTEM_TYPE}":
+                # see BaseController.start
+                info = msg["objectList"][0]
+                controller._systemInfo = SystemInfo(info["objnam"], info["params"])
+            else:
+                # see ModelController.start
+                controller.model.addObjects(prune(msg["objectList"]))
+        elif command == "RequestParamList":
+            controller._applyUpdates(msg["objectList"])
+        elif command == "GetQuery":
+            controller.receivedQueryResult(msg["queryName"], msg["answer"])
+
+    def run(self, path: str) -> None:
+        """Replay a capture as fast as possible."""
+        for _, direction, line in readCapture(path):
+            self.feed(direction, line)
+
+    async def play(self, path: str, speed: float = 1.0) -> None:
+        """Replay a capture paced by its timestamps.
+
+        a speed of 2 replays twice as fast as the capture was recorded
+        """
+        start = time.monotonic()
+        origin = None
+        for timestamp, direction, line in readCapture(path):
+            if origin is None:
+                origin = timestamp
+            delay = (timestamp - origin) / speed - (time.monotonic() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.feed(direction, line)
+
+
+# ---------------------------------------------------------------------------
+
+
+def main():
+    """Replay a capture and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("capture", help="the capture file")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=0,
+        help="pace the replay (1 for real time), 0 replays as fast as possible",
+    )
+    args = parser.parse_args()
+
+    driver = ReplayDriver()
+    updates = {"callbacks": 0, "objects": 0}
+
+    def updated(controller, changes):
+        updates["callbacks"] += 1
+        updates["objects"] += len(changes)
+
+    driver.controller._updatedCallback = updated
+
+    start = time.perf_counter()
+    if args.speed:
+        asyncio.run(driver.play(args.capture, args.speed))
+    else:
+        driver.run(args.capture)
+    elapsed = time.perf_counter() - start
+
+    print(f"replayed in {elapsed:.3f}s: {driver.stats}")
+    print(f"model: {driver.controller.model.numObjects} objects, updates: {updates}")
+
+
+if __name__ == "__main__":
+    main()
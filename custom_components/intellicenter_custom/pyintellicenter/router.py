@@ -0,0 +1,95 @@
+"""Routing of the updates of a model to the parties depending on them."""
+
+from itertools import count
+import logging
+from typing import Callable
+
+_LOGGER = logging.getLogger(__name__)
+
+# the attribute to depend on to be called for any change to an object
+ANY_ATTRIBUTE = None
+
+# ---------------------------------------------------------------------------
+
+
+class UpdateRouter:
+    """Call the subscribers of the objects/attributes an update changes.
+
+    instead of broadcasting every update to every subscriber, each of them
+    checking if it is concerned, the cost of an update only depends on the
+    number of subscribers it concerns
+    """
+
+    def __init__(self):
+        """Initialize."""
+        # objnam -> attribute -> subscription id -> callback
+        self._routes: dict[str, dict[str, dict[int, Callable]]] = {}
+        self._ids = count()
+
+    def subscribe(self, dependencies: dict, callback: Callable) -> Callable:
+        """Call callback(updates) when an update changes one of the dependencies.
+
+        dependencies maps objnams to the attributes depended on
+        (ANY_ATTRIBUTE for all of them)
+        return a function cancelling the subscription
+        """
+        subscription = next(self._ids)
+        routes = []
+        for objnam, attributes in dependencies.items():
+            byAttribute = self._routes.setdefault(objnam, {})
+            for attribute in attributes:
+                subscribers = byAttribute.setdefault(attribute, {})
+                subscribers[subscription] = callback
+                routes.append((objnam, attribute))
+
+        def unsubscribe() -> None:
+            for objnam, attribute in routes:
+                byAttribute = self._routes.get(objnam, {})
+                subscribers = byAttribute.get(attribute, {})
+                subscribers.pop(subscription, None)
+                if not subscribers:
+                    byAttribute.pop(attribute, None)
+                if not byAttribute:
+                    self._routes.pop(objnam, None)
+            routes.clear()
+
+        return unsubscribe
+
+    @property
+    def numRoutes(self) -> int:
+        """Return the number of (objnam, attribute) routes."""
+        return sum(len(byAttribute) for byAttribute in self._routes.values())
+
+    def route(self, updates: dict) -> int:
+        """Call the subscribers concerned by updates, return how many were.
+
+        updates is what ModelController passes to its update callback:
+        objnam -> the attributes changed and their new values
+        each subscriber is called once, with all the updates
+        """
+        targets = {}
+        for objnam, changes in updates.items():
+            byAttribute = self._routes.get(objnam)
+            if not byAttribute:
+                continue
+            subscribers = byAttribute.get(ANY_ATTRIBUTE)
+            if subscribers:
+                targets.update(subscribers)
+            # walk the smaller of the two
+            if len(changes) <= len(byAttribute):
+                for attribute in changes:
+                    subscribers = byAttribute.get(attribute)
+                    if subscribers:
+                        targets.update(subscribers)
+            else:
+                for attribute, subscribers in byAttribute.items():
+                    if attribute in changes:
+                        targets.update(subscribers)
+
+        for callback in targets.values():
+            try:
+                callback(updates)
+            except Exception:
+                # one failing subscriber must not deprive the others
+                _LOGGER.exception(f"error while routing updates to {callback}")
+        return len(targets)
@@ -0,0 +1,621 @@
+"""A local IntelliCenter simulator for load and latency testing.
+
+It speaks the same line delimited JSON protocol as the real system and
+supports GetParamList, RequestParamList, ReleaseParamList, SETPARAMLIST
+(answered with WriteParamList), GetQuery, ping/pong and unsolicited
+NotifyList notifications for the subscribed attributes.
+
+The number of objects, the rate of notifications, the latency of the
+responses and the rate of errors are configurable. For example, from the
+custom_components/intellicenter_custom directory:
+
+    python -m pyintellicenter.simulator --objects 1000 --notify-rate 50
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+
+from .attributes import (
+    ACT_ATTR,
+    ALL_ATTRIBUTES_BY_TYPE,
+    BODY_ATTR,
+    BODY_TYPE,
+    CHEM_TYPE,
+    CIRCUIT_ATTR,
+    CIRCUIT_TYPE,
+    FEATR_ATTR,
+    GPM_ATTR,
+    HEATER_ATTR,
+    HEATER_TYPE,
+    HTMODE_ATTR,
+    LISTORD_ATTR,
+    LOTMP_ATTR,
+    LSTTMP_ATTR,
+    MODE_ATTR,
+    NULL_OBJNAM,
+    OBJTYP_ATTR,
+    ORPVAL_ATTR,
+    PARENT_ATTR,
+    PHVAL_ATTR,
+    PMPCIRC_TYPE,
+    PRIM_ATTR,
+    PROPNAME_ATTR,
+    PUMP_TYPE,
+    PWR_ATTR,
+    RPM_ATTR,
+    SALT_ATTR,
+    SCHED_TYPE,
+    SEC_ATTR,
+    SENSE_TYPE,
+    SNAME_ATTR,
+    SOURCE_ATTR,
+    STATUS_ATTR,
+    SUBTYP_ATTR,
+    SUPER_ATTR,
+    SYSTEM_TYPE,
+    USE_ATTR,
+    VACFLO_ATTR,
+    VER_ATTR,
+    VOL_ATTR,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_PORT = 6681
+
+CIRCUIT_SUBTYPES = ["GENERIC", "LIGHT", "INTELLI", "MAGIC2", "DIMMER", "LITSHO"]
+
+# ---------------------------------------------------------------------------
+
+
+class SimulatedSystem:
+    """The objects of a simulated IntelliCenter and their attributes."""
+
+    # the types of the objects randomChange picks from
+    LIVE_TYPES = {PUMP_TYPE, SENSE_TYPE, BODY_TYPE, CHEM_TYPE, CIRCUIT_TYPE, SCHED_TYPE}
+
+    def __init__(self, numObjects: int = 50, seed: int = 0):
+        """Generate a system with (about) numObjects objects."""
+        self._random = random.Random(seed)
+        # objnam -> params (including OBJTYP and SUBTYP)
+        self.objects = {}
+        self.systemObjnam = "SYS01"
+        self._live = None
+        self._generate(numObjects)
+
+    def _add(self, objnam: str, objtype: str, subtype: str = None, **params):
+        """Add an object, filling the attributes not given with plausible values."""
+        values = {OBJTYP_ATTR: objtype}
+        if subtype:
+            values[SUBTYP_ATTR] = subtype
+        for key in ALL_ATTRIBUTES_BY_TYPE.get(objtype, []):
+            if key not in (OBJTYP_ATTR, SUBTYP_ATTR):
+                values[key] = self._random.choice(["OFF", "ON", "0", "1"])
+        values[SNAME_ATTR] = f"{objtype.capitalize()} {objnam}"
+        values[LISTORD_ATTR] = str(len(self.objects))
+        values.update(params)
+        self.objects[objnam] = values
+
+    def _generate(self, numObjects: int) -> None:
+        """Generate the objects of the system."""
+        rnd = self._random
+        self._add(
+            self.systemObjnam,
+            SYSTEM_TYPE,
+            **{
+                PROPNAME_ATTR: "Simulated Pool",
+                VER_ATTR: "IC: 1.064 , ICWEB:2021-10-19 1.007",
+                MODE_ATTR: "ENGLISH",
+                SNAME_ATTR: "Simulated IntelliCenter",
+                VACFLO_ATTR: "OFF",
+            },
+        )
+        for objnam, subtype, temp in (("B1101", "POOL", "80"), ("B1202", "SPA", "101")):
+            self._add(
+                objnam,
+                BODY_TYPE,
+                subtype,
+                **{
+                    STATUS_ATTR: "ON",
+                    HEATER_ATTR: NULL_OBJNAM,
+                    HTMODE_ATTR: "0",
+                    LOTMP_ATTR: temp,
+                    LSTTMP_ATTR: temp,
+                    VOL_ATTR: "20000",
+                    PARENT_ATTR: NULL_OBJNAM,
+                },
+            )
+        for objnam in ("H0001", "H0002"):
+            self._add(objnam, HEATER_TYPE, "GENERIC", **{BODY_ATTR: "B1101 B1202"})
+        for objnam, subtype in (
+            ("SSW11", "POOL"),
+            ("SSA11", "AIR"),
+            ("SSS11", "SOLAR"),
+        ):
+            self._add(objnam, SENSE_TYPE, subtype, **{SOURCE_ATTR: "75"})
+        self._add(
+            "CHR01",
+            CHEM_TYPE,
+            "ICHLOR",
+            **{
+                BODY_ATTR: "B1101 B1202",
+                PRIM_ATTR: "50",
+                SEC_ATTR: "20",
+                SALT_ATTR: "3200",
+                SUPER_ATTR: "OFF",
+            },
+        )
+        self._add(
+            "CHM01",
+            CHEM_TYPE,
+            "ICHEM",
+            **{BODY_ATTR: "B1101", PHVAL_ATTR: "7.4", ORPVAL_ATTR: "700"},
+        )
+        self._add(
+            "C0001", CIRCUIT_TYPE, "FRZ", **{STATUS_ATTR: "OFF", FEATR_ATTR: "OFF"}
+        )
+
+        index = 0
+        while len(self.objects) < numObjects:
+            index += 1
+            kind = index % 10
+            if kind < 6:
+                subtype = CIRCUIT_SUBTYPES[index % len(CIRCUIT_SUBTYPES)]
+                self._add(
+                    f"C{index + 1:04}",
+                    CIRCUIT_TYPE,
+                    subtype,
+                    **{
+                        STATUS_ATTR: rnd.choice(["ON", "OFF"]),
+                        FEATR_ATTR: rnd.choice(["ON", "OFF"]),
+                        USE_ATTR: "WHITER",
+                        PARENT_ATTR: NULL_OBJNAM,
+                    },
+                )
+            elif kind < 8:
+                self._add(
+                    f"SCH{index:03}",
+                    SCHED_TYPE,
+                    **{
+                        ACT_ATTR: "OFF",
+                        VACFLO_ATTR: "OFF",
+                        CIRCUIT_ATTR: rnd.choice(list(self.objects)),
+                    },
+                )
+            elif kind < 9:
+                pump = f"PMP{index:02}"
+                self._add(
+                    pump,
+                    PUMP_TYPE,
+                    "SPEED",
+                    **{
+                        STATUS_ATTR: "10",
+                        RPM_ATTR: "2000",
+                        PWR_ATTR: "600",
+                        GPM_ATTR: "40",
+                        BODY_ATTR: "B1101",
+                    },
+                )
+            else:
+                self._add(
+                    f"PC{index:03}",
+                    PMPCIRC_TYPE,
+                    **{PARENT_ATTR: rnd.choice(list(self.objects))},
+                )
+
+    def getParams(self, objnam: str, keys: list) -> dict:
+        """Return the values of some attributes, undefined ones being their own name."""
+        params = self.objects[objnam]
+        return {key: params.get(key, key) for key in keys}
+
+    def select(self, condition: str, keys: list) -> list:
+        """Return objects and their attributes matching a condition (like OBJTYP=BODY)."""
+        objtype = None
+        if condition and condition.startswith(f"{OBJTYP_ATTR}="):
+            objtype = condition.split("=", 1)[1]
+        return [
+            {"objnam": objnam, "params": self.getParams(objnam, keys)}
+            for objnam, params in self.objects.items()
+            if objtype is None or params[OBJTYP_ATTR] == objtype
+        ]
+
+    def change(self, objnam: str, params: dict) -> dict:
+        """Apply changes to an object and return the ones that were effective."""
+        current = self.objects.get(objnam)
+        if current is None:
+            return {}
+        changed = {
+            key: value for key, value in params.items() if current.get(key) != value
+        }
+        current.update(changed)
+        return changed
+
+    def randomChange(self):
+        """Change a 'live' value (a pump, sensor or chemistry reading) at random."""
+        rnd = self._random
+        if self._live is None:
+            self._live = [
+                objnam
+                for objnam, params in self.objects.items()
+                if params[OBJTYP_ATTR] in self.LIVE_TYPES
+            ]
+        objnam = rnd.choice(self._live)
+        objtype = self.objects[objnam][OBJTYP_ATTR]
+        if objtype == PUMP_TYPE:
+            params = {
+                RPM_ATTR: str(rnd.randint(1000, 3450)),
+                PWR_ATTR: str(rnd.randint(100, 2000)),
+                GPM_ATTR: str(rnd.randint(10, 90)),
+            }
+        elif objtype == SENSE_TYPE:
+            params = {SOURCE_ATTR: str(rnd.randint(60, 95))}
+        elif objtype == BODY_TYPE:
+            params = {LSTTMP_ATTR: str(rnd.randint(70, 104))}
+        elif objtype == CHEM_TYPE:
+            params = {
+                PHVAL_ATTR: f"{rnd.uniform(7.0, 7.8):.1f}",
+                ORPVAL_ATTR: str(rnd.randint(600, 800)),
+            }
+        else:
+            key = STATUS_ATTR if objtype == CIRCUIT_TYPE else ACT_ATTR
+            params = {key: rnd.choice(["ON", "OFF"])}
+        return objnam, self.change(objnam, params)
+
+    def query(self, queryName: str):
+        """Return the answer to a GetQuery."""
+        if queryName == "GetCircuitNames":
+            return [
+                {"objnam": objnam, "params": {SNAME_ATTR: params[SNAME_ATTR]}}
+                for objnam, params in self.objects.items()
+                if params[OBJTYP_ATTR] == CIRCUIT_TYPE
+            ]
+        if queryName == "GetCircuitTypes":
+            return [
+                {"systemValue": subtype, "readableValue": subtype.capitalize()}
+                for subtype in CIRCUIT_SUBTYPES
+            ]
+        if queryName in ("GetHardwareDefinition", "GetConfiguration"):
+            return [
+                {"objnam": objnam, "params": dict(params)}
+                for objnam, params in self.objects.items()
+            ]
+        return None
+
+
+# ---------------------------------------------------------------------------
+
+
+class SimulatorProtocol(asyncio.Protocol):
+    """The connection of a client to the simulator."""
+
+    def __init__(self, server):
+        """Initialize."""
+        self._server = server
+        self._transport = None
+        self._buffer = ""
+        self._decoder = json.JSONDecoder()
+        # objnam -> set of the attributes the client subscribed to
+        self.subscriptions = {}
+
+    def connection_made(self, transport):
+        """Handle a new client."""
+        self._transport = transport
+        self._server.clients.add(self)
+
+    def connection_lost(self, exc):
+        """Handle a client going away."""
+        self._server.clients.discard(self)
+        self._transport = None
+
+    def data_received(self, data: bytes) -> None:
+        """Split the stream of requests (they are not delimited) and handle them."""
+        self._buffer += data.decode()
+        buffer = self._buffer
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos == len(buffer):
+                break
+            if buffer.startswith("ping", pos):
+                pos += 4
+                self._server.stats["pings"] += 1
+                self._server.respond(self, b"pong")
+                continue
+            try:
+                msg, pos = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # incomplete request, wait for more data
+                break
+            self._server.handle(self, msg)
+        self._buffer = buffer[pos:]
+
+    def send(self, message) -> None:
+        """Send a message (a dictionary or bytes) followed by CRLF."""
+        if not self._transport or self._transport.is_closing():
+            return
+        if isinstance(message, dict):
+            message = json.dumps(message).encode()
+        self._transport.write(message + b"\r\n")
+
+    def close(self) -> None:
+        """Disconnect the client."""
+        if self._transport:
+            self._transport.close()
+
+
+# ---------------------------------------------------------------------------
+
+
+class IntelliCenterSimulator:
+    """An asyncio TCP server behaving like an IntelliCenter."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_PORT,
+        numObjects: int = 50,
+        notifyRate: float = 0,
+        latency: float = 0,
+        latencyJitter: float = 0,
+        errorRate: float = 0,
+        errorCode: str = "400",
+        maxAttributes: int = 0,
+        seed: int = 0,
+    ):
+        """Initialize the simulator.
+
+        notifyRate is the number of unsolicited changes per second,
+        latency (+/- latencyJitter) the delay in seconds before a response,
+        errorRate the probability for a request to fail with errorCode
+        (and, like the real system, a messageID not matching the request)
+        maxAttributes, if not 0, makes a RequestParamList asking for more
+        attributes than that fail with errorCode, as a system choking on
+        a query too large would
+        """
+        self.system = SimulatedSystem(numObjects, seed)
+        self.clients = set()
+        self.stats = {
+            "requests": 0,
+            "errors": 0,
+            "notifications": 0,
+            "pings": 0,
+        }
+
+        self._host = host
+        self._port = port
+        self._notifyRate = notifyRate
+        self._latency = latency
+        self._latencyJitter = latencyJitter
+        self._errorRate = errorRate
+        self._errorCode = errorCode
+        self._maxAttributes = maxAttributes
+        self._random = random.Random(seed)
+        self._server = None
+        self._notifierTask = None
+
+    @property
+    def port(self) -> int:
+        """Return the port the simulator listens to (useful when started with 0)."""
+        if self._server and self._server.sockets:
+            return self._server.sockets[0].getsockname()[1]
+        return self._port
+
+    async def start(self) -> None:
+        """Start listening and, if configured, notifying."""
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_server(
+            lambda: SimulatorProtocol(self), self._host, self._port
+        )
+        if self._notifyRate:
+            self._notifierTask = asyncio.create_task(self._notifier())
+
+    async def stop(self) -> None:
+        """Disconnect all clients and stop listening."""
+        if self._notifierTask:
+            self._notifierTask.cancel()
+            self._notifierTask = None
+        for client in list(self.clients):
+            client.close()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def disconnectAll(self) -> None:
+        """Drop every client connection, as a reboot of the system would."""
+        for client in list(self.clients):
+            client.close()
+
+    def _delay(self) -> float:
+        """Return the latency for a response."""
+        if not self._latencyJitter:
+            return self._latency
+        return max(
+            0,
+            self._latency
+            + self._random.uniform(-self._latencyJitter, self._latencyJitter),
+        )
+
+    def respond(self, client: SimulatorProtocol, message) -> None:
+        """Send a response to a client after the configured latency."""
+        delay = self._delay()
+        if delay:
+            asyncio.get_running_loop().call_later(delay, client.send, message)
+        else:
+            client.send(message)
+
+    def notify(self, objnam: str, changes: dict, exclude=None) -> None:
+        """Send a NotifyList to every client subscribed to the changed attributes."""
+        for client in self.clients:
+            if client is exclude:
+                continue
+            keys = client.subscriptions.get(objnam)
+            if not keys:
+                continue
+            params = {key: value for key, value in changes.items() if key in keys}
+            if params:
+                self.stats["notifications"] += 1
+                client.send(
+                    {
+                        "command": "NotifyList",
+                        "messageID": str(self._random.randint(1, 1 << 30)),
+                        "objectList": [{"objnam": objnam, "params": params}],
+                    }
+                )
+
+    async def _notifier(self) -> None:
+        """Generate random changes at the configured rate."""
+        interval = 1.0 / self._notifyRate
+        loop = asyncio.get_running_loop()
+        next_time = loop.time()
+        while True:
+            next_time += interval
+            objnam, changes = self.system.randomChange()
+            if changes:
+                self.notify(objnam, changes)
+            await asyncio.sleep(max(0, next_time - loop.time()))
+
+    def handle(self, client: SimulatorProtocol, msg: dict) -> None:
+        """Handle a request from a client."""
+        self.stats["requests"] += 1
+        msg_id = msg.get("messageID", "")
+        command = msg.get("command", "")
+
+        if (self._errorRate and self._random.random() < self._errorRate) or (
+            self._maxAttributes
+            and command == "RequestParamList"
+            and sum(len(item["keys"]) for item in msg["objectList"])
+            > self._maxAttributes
+        ):
+            self.stats["errors"] += 1
+            self.respond(
+                client,
+                {
+                    "command": command,
+                    "messageID": f"{msg_id}-error",
+                    "response": self._errorCode,
+                },
+            )
+            return
+
+        response = {"messageID": msg_id, "response": "200"}
+
+        if command == "GetParamList":
+            keys = msg["objectList"][0]["keys"]
+            response["command"] = "SendParamList"
+            response["objectList"] = self.system.select(msg.get("condition", ""), keys)
+        elif command == "RequestParamList":
+            objectList = []
+            for item in msg["objectList"]:
+                objnam = item["objnam"]
+                if objnam not in self.system.objects:
+                    continue
+                client.subscriptions.setdefault(objnam, set()).update(item["keys"])
+                objectList.append(
+                    {
+                        "objnam": objnam,
+                        "params": self.system.getParams(objnam, item["keys"]),
+                    }
+                )
+            response["command"] = "SendParamList"
+            response["objectList"] = objectList
+        elif command == "ReleaseParamList":
+            for item in msg["objectList"]:
+                keys = client.subscriptions.get(item["objnam"])
+                if keys is not None:
+                    keys.difference_update(item["keys"])
+            response["command"] = "ReleaseParamList"
+        elif command == "SETPARAMLIST":
+            changes = []
+            for item in msg["objectList"]:
+                changed = self.system.change(item["objnam"], item["params"])
+                if changed:
+                    changes.append({"objnam": item["objnam"], "params": changed})
+            response["command"] = "SetParamList"
+            response["objectList"] = msg["objectList"]
+            self.respond(client, response)
+            if changes:
+                self.respond(
+                    client,
+                    {
+                        "command": "WriteParamList",
+                        "messageID": msg_id,
+                        "objectList": [{"changes": changes}],
+                    },
+                )
+                for change in changes:
+                    self.notify(change["objnam"], change["params"], exclude=client)
+            return
+        elif command == "GetQuery":
+            response["command"] = "SendQuery"
+            response["queryName"] = msg.get("queryName")
+            response["answer"] = self.system.query(msg.get("queryName"))
+        else:
+            response["response"] = "404"
+            response["command"] = command
+
+        self.respond(client, response)
+
+
+# ---------------------------------------------------------------------------
+
+
+def main():
+    """Run a simulator from the command line."""
+    parser = argparse.ArgumentParser(description="Simulate a Pentair IntelliCenter")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--objects", type=int, default=50)
+    parser.add_argument(
+        "--notify-rate", type=float, default=1, help="changes per second"
+    )
+    parser.add_argument("--latency", type=float, default=0, help="in seconds")
+    parser.add_argument("--jitter", type=float, default=0, help="in seconds")
+    parser.add_argument("--error-rate", type=float, default=0, help="0 to 1")
+    parser.add_argument(
+        "--max-attributes",
+        type=int,
+        default=0,
+        help="largest RequestParamList accepted, 0 for no limit",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    async def run():
+        simulator = IntelliCenterSimulator(
+            args.host,
+            args.port,
+            numObjects=args.objects,
+            notifyRate=args.notify_rate,
+            latency=args.latency,
+            latencyJitter=args.jitter,
+            errorRate=args.error_rate,
+            maxAttributes=args.max_attributes,
+            seed=args.seed,
+        )
+        await simulator.start()
+        _LOGGER.info(
+            f"simulating {len(simulator.system.objects)} objects on "
+            f"{args.host}:{simulator.port}"
+        )
+        try:
+            while True:
+                await asyncio.sleep(10)
+                _LOGGER.info(f"{len(simulator.clients)} client(s) {simulator.stats}")
+        finally:
+            await simulator.stop()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
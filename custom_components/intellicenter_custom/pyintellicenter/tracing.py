@@ -0,0 +1,38 @@
+"""Runtime switches for the debug logging of pyintellicenter.
+
+Messages on the hot paths are only formatted when the logger of their
+subsystem is enabled for DEBUG, so leaving a subsystem disabled costs
+a level check per message:
+
+    if WIRE_LOGGER.isEnabledFor(logging.DEBUG):
+        WIRE_LOGGER.debug("PROTOCOL: received %s", data)
+
+The full content of the traffic goes to the 'wire' subsystem so that the
+protocol can be traced without dumping every packet.
+"""
+
+import logging
+
+_PACKAGE = __name__.rpartition(".")[0]
+
+# name of each subsystem -> name of its logger
+SUBSYSTEMS = {
+    "protocol": f"{_PACKAGE}.protocol",
+    "wire": f"{_PACKAGE}.protocol.wire",
+    "controller": f"{_PACKAGE}.controller",
+    "model": f"{_PACKAGE}.model",
+}
+
+WIRE_LOGGER = logging.getLogger(SUBSYSTEMS["wire"])
+
+
+def setDebug(subsystem: str, enabled: bool = True) -> None:
+    """Enable or disable debug logging for a subsystem (see SUBSYSTEMS)."""
+    logging.getLogger(SUBSYSTEMS[subsystem]).setLevel(
+        logging.DEBUG if enabled else logging.INFO
+    )
+
+
+def isDebug(subsystem: str) -> bool:
+    """Return True if debug logging is enabled for a subsystem."""
+    return logging.getLogger(SUBSYSTEMS[subsystem]).isEnabledFor(logging.DEBUG)
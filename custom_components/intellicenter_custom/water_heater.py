@@ -1,7 +1,7 @@
 """Pentair Intellicenter water heaters."""
 
 import logging
-from typing import Any, Optional
+from typing import Any
 
 from homeassistant.components.water_heater import (
     WaterHeaterEntity,
@@ -24,6 +24,7 @@ from .pyintellicenter import (
     LOTMP_ATTR,
     LSTTMP_ATTR,
     NULL_OBJNAM,
+    SNAME_ATTR,
     STATUS_ATTR,
     ModelController,
     PoolObject,
@@ -43,24 +44,22 @@ async def async_setup_entry(
     # here we try to figure out which heater, if any, can be used for a given
     # body of water
 
-    # first find all heaters
-    # and sort them by their UI order (if they don't have one, use 100 and place them last)
-    heaters = sorted(
-        controller.model.getByType(HEATER_TYPE),
-        key=lambda h: int(h[LISTORD_ATTR]) if h[LISTORD_ATTR] else 100,
-    )
-
     bodies = controller.model.getByType(BODY_TYPE)
 
     water_heaters = []
     body: PoolObject
     for body in bodies:
-        heater_list = []
-        heater: PoolObject
-        for heater in heaters:
-            # if the heater supports this body, add it to the list
-            if body.objnam in heater[BODY_ATTR].split(" "):
-                heater_list.append(heater.objnam)
+        # the heaters supporting this body
+        # sorted by their UI order (if they don't have one, use 100 and place them last)
+        heaters = sorted(
+            (
+                heater
+                for heater in controller.model.getReferrers(body.objnam, BODY_ATTR)
+                if heater.objtype == HEATER_TYPE
+            ),
+            key=lambda h: int(h[LISTORD_ATTR]) if h[LISTORD_ATTR] else 100,
+        )
+        heater_list = [heater.objnam for heater in heaters]
         if heater_list:
             water_heaters.append(PoolWaterHeater(entry, controller, body, heater_list))
 
@@ -93,11 +92,10 @@ class PoolWaterHeater(PoolEntity, WaterHeaterEntity, RestoreEntity):
         self._lastHeater = self._poolObject[HEATER_ATTR]
         self._attr_icon = "mdi:thermometer"
 
-    @property
-    def extra_state_attributes(self) -> Optional[dict[str, Any]]:
-        """Return the state attributes of the entity."""
+    def _stateAttributes(self) -> dict[str, Any]:
+        """Compute the state attributes of the entity."""
 
-        state_attributes = super().extra_state_attributes
+        state_attributes = super()._stateAttributes()
 
         if self._lastHeater != NULL_OBJNAM:
             state_attributes[self.LAST_HEATER_ATTR] = self._lastHeater
@@ -142,12 +140,12 @@ class PoolWaterHeater(PoolEntity, WaterHeaterEntity, RestoreEntity):
     @property
     def current_temperature(self):
         """Return the current temperature."""
-        return float(self._poolObject[LSTTMP_ATTR])
+        return self._poolObject.getValue(LSTTMP_ATTR)
 
     @property
     def target_temperature(self):
         """Return the temperature we try to reach."""
-        return float(self._poolObject[LOTMP_ATTR])
+        return self._poolObject.getValue(LOTMP_ATTR)
 
     def set_temperature(self, **kwargs):
         """Set new target temperatures."""
@@ -195,6 +193,19 @@ class PoolWaterHeater(PoolEntity, WaterHeaterEntity, RestoreEntity):
     def _turnOff(self):
         self.requestChanges({HEATER_ATTR: NULL_OBJNAM})
 
+    def dependencies(self) -> dict[str, set[str]]:
+        """Return the attributes, by objnam, the state of the entity depends on."""
+        # the names of the heaters are the operation modes
+        dependencies = {heater: {SNAME_ATTR} for heater in self._heater_list}
+        dependencies[self._poolObject.objnam] = {
+            STATUS_ATTR,
+            HEATER_ATTR,
+            HTMODE_ATTR,
+            LOTMP_ATTR,
+            LSTTMP_ATTR,
+        }
+        return dependencies
+
     def isUpdated(self, updates: dict[str, dict[str, str]]) -> bool:
         """Return true if the entity is updated by the updates from Intellicenter."""
 
@@ -207,9 +218,17 @@ class PoolWaterHeater(PoolEntity, WaterHeaterEntity, RestoreEntity):
         )
 
         if updated and self._poolObject[HEATER_ATTR] != NULL_OBJNAM:
-            self._lastHeater = self._poolObject[HEATER_ATTR]
+            self._setLastHeater(self._poolObject[HEATER_ATTR])
+
+        return updated or any(
+            SNAME_ATTR in updates.get(heater, {}) for heater in self._heater_list
+        )
 
-        return updated
+    def _setLastHeater(self, heater: str) -> None:
+        """Record the last heater used, shown in the state attributes."""
+        if heater != self._lastHeater:
+            self._lastHeater = heater
+            self._cachedStateAttributes = None
 
     async def async_added_to_hass(self):
         """Entity is added to Home Assistant."""
@@ -224,4 +243,4 @@ class PoolWaterHeater(PoolEntity, WaterHeaterEntity, RestoreEntity):
             if last_state:
                 value = last_state.attributes.get(self.LAST_HEATER_ATTR)
                 if value != NULL_OBJNAM:
-                    self._lastHeater = value
+                    self._setLastHeater(value)